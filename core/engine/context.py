@@ -1,7 +1,7 @@
 """Execution context - transaction-like wrapper for processor operations."""
 
 from pathlib import Path
-from typing import Optional, Any
+from typing import AsyncIterable, Optional, Any
 from datetime import datetime
 import aiofiles
 import aiofiles.os
@@ -120,6 +120,62 @@ class ExecutionContext:
         logger.debug(f"Created file: {path}")
         return artifact
     
+    async def create_file_stream(
+        self,
+        path: Path | str,
+        chunks: AsyncIterable[bytes],
+    ) -> Artifact:
+        """
+        Create a new file from a stream of byte chunks and track it as an artifact.
+        
+        Unlike create_file, the content is never held in memory and is not
+        stored on the artifact; reverting a file creation only deletes it.
+        
+        Args:
+            path: Path to create the file at
+            chunks: Byte chunks to write, in order
+        
+        Returns:
+            The created artifact (metadata["size"] holds the bytes written)
+        
+        Raises:
+            FileExistsError: If the file already exists
+        """
+        path = Path(path)
+        
+        if path.exists():
+            raise FileExistsError(f"File already exists: {path}")
+        
+        artifact = Artifact(
+            job_id=self.job.id,
+            step_name=self.step_name,
+            artifact_type=ArtifactType.FILE_CREATE,
+            target=str(path),
+            reversibility=ReversibilityLevel.FULLY_REVERSIBLE,
+        )
+        
+        # Create parent directories if needed
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Write the file chunk by chunk, removing it if the stream fails
+        size = 0
+        try:
+            async with aiofiles.open(path, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            if path.exists():
+                await aiofiles.os.remove(path)
+            raise
+        
+        artifact.metadata["size"] = size
+        artifact.mark_created()
+        self._pending_artifacts.append(artifact)
+        
+        logger.debug(f"Created file: {path} ({size} bytes)")
+        return artifact
+    
     async def modify_file(
         self,
         path: Path | str,
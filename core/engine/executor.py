@@ -277,7 +277,9 @@ class JobExecutor:
         
         # Mark step as reverted
         result.mark_reverted()
-        await self.job_store.save(job)
+        async with self.job_store.batch():
+            await self.job_store.save_step_result(job.id, result)
+            await self.job_store.save(job)
         
         logger.info(f"Successfully reverted step {step_name} for job {job.id}")
         return True
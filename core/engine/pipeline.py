@@ -186,13 +186,18 @@ class Pipeline:
         if len(self._active_jobs) >= self.max_concurrent_jobs:
             return
         
-        # Get pending jobs
-        pending = await self.job_store.list_pending(
-            limit=self.max_concurrent_jobs - len(self._active_jobs)
+        free_slots = self.max_concurrent_jobs - len(self._active_jobs)
+        
+        # Active jobs can still be pending in the store, so skip them by ID
+        # and only load the jobs that will actually be started
+        pending_ids = await self.job_store.list_pending_ids(
+            limit=free_slots + len(self._active_jobs)
         )
+        new_ids = [job_id for job_id in pending_ids if job_id not in self._active_jobs]
         
-        for job in pending:
-            if job.id not in self._active_jobs:
+        for job_id in new_ids[:free_slots]:
+            job = await self.job_store.get(job_id)
+            if job:
                 asyncio.create_task(self._process_job_async(job))
     
     async def _process_job_async(self, job: Job) -> None:
@@ -527,7 +532,7 @@ class Pipeline:
         config = event.watch_config
         
         # Check if job already exists for this file
-        existing_jobs = await self.job_store.list_all(limit=1000)
+        existing_jobs = await self.job_store.list_summaries(limit=1000)
         for job in existing_jobs:
             if job.source_path == str(event.path):
                 # For modified events, we might want to re-process
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from typing import Optional, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from uuid import uuid4
 
 from .enums import JobStatus
@@ -95,6 +95,9 @@ class Job(BaseModel):
     priority: int = 0
     """Job priority (higher = processed first)."""
     
+    _persisted_history: int = PrivateAttr(default=0)
+    """How many history entries are already stored (maintained by JobStore)."""
+    
     class Config:
         """Pydantic configuration."""
         use_enum_values = True
@@ -1,6 +1,9 @@
 """Base Processor class - the plugin interface."""
 
 from abc import ABC, abstractmethod
+from collections import ChainMap
+from collections.abc import Mapping
+from types import MappingProxyType
 from typing import Optional, Any
 from pathlib import Path
 import logging
@@ -137,8 +140,15 @@ class Processor(ABC):
     # Internal state
     # -------------------------------------------------------------------------
     
-    _config: dict[str, Any]
-    """Runtime configuration (merged from defaults and job config)."""
+    _frozen_defaults: Mapping[str, Any] = MappingProxyType({})
+    """Read-only snapshot of the defaults, built once per class."""
+    
+    _config: ChainMap
+    """Runtime configuration (overrides layered over the frozen defaults)."""
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._frozen_defaults = MappingProxyType(dict(cls.default_config))
     
     def __init__(self, config: Optional[dict[str, Any]] = None):
         """
@@ -147,10 +157,10 @@ class Processor(ABC):
         Args:
             config: Configuration overrides
         """
-        self._config = {**self.default_config, **(config or {})}
+        self._config = ChainMap(dict(config) if config else {}, self._frozen_defaults)
     
     @property
-    def config(self) -> dict[str, Any]:
+    def config(self) -> Mapping[str, Any]:
         """Get the runtime configuration."""
         return self._config
     
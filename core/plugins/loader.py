@@ -1,6 +1,7 @@
 """Plugin loader - discovers and loads processor plugins."""
 
 from pathlib import Path
+from types import MappingProxyType
 from typing import Optional, Any
 import importlib.util
 import sys
@@ -111,19 +112,24 @@ class PluginLoader:
         if not processor_class:
             return None
         
-        # Instantiate processor with config from manifest
+        # Freeze manifest defaults onto the class once, so instances
+        # only layer their own overrides on top
         config = manifest.get("config", {})
-        default_config = {}
-        for key, schema in config.items():
-            if "default" in schema:
-                default_config[key] = schema["default"]
+        default_config = {
+            key: schema["default"]
+            for key, schema in config.items()
+            if "default" in schema
+        }
+        processor_class._frozen_defaults = MappingProxyType(
+            {**processor_class.default_config, **default_config}
+        )
         
         try:
-            processor = processor_class(config=default_config)
+            processor = processor_class()
             
             # Override metadata from manifest if provided
             if "name" in manifest:
-                processor.name = manifest["name"]
+                processor.name = sys.intern(manifest["name"])
             if "display_name" in manifest:
                 processor.display_name = manifest["display_name"]
             if "description" in manifest:
@@ -131,7 +137,7 @@ class PluginLoader:
             if "version" in manifest:
                 processor.version = manifest["version"]
             if "requires" in manifest:
-                processor.requires = manifest["requires"]
+                processor.requires = [sys.intern(dep) for dep in manifest["requires"] or []]
             if "config" in manifest:
                 processor.config_schema = manifest["config"]
             
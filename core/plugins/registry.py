@@ -1,7 +1,9 @@
 """Processor registry - central registry for all loaded processors."""
 
+from collections import deque
 from typing import Optional
 import logging
+import sys
 
 from .base import Processor
 from ..models import StepDefinition
@@ -36,6 +38,11 @@ class ProcessorRegistry:
         if processor.name in self._processors:
             raise ValueError(f"Processor '{processor.name}' is already registered")
         
+        # Names are used as dict keys throughout dependency resolution;
+        # interning lets lookups short-circuit on identity.
+        processor.name = sys.intern(processor.name)
+        processor.requires = [sys.intern(dep) for dep in processor.requires]
+        
         self._processors[processor.name] = processor
         self._definitions[processor.name] = processor.to_definition()
         
@@ -186,22 +193,35 @@ class ProcessorRegistry:
         Raises:
             ValueError: If there's a circular dependency
         """
+        # Fast path: nothing to order
+        if len(processors) < 2:
+            return list(processors)
+        
+        proc_set = set(processors)
+        
+        # Fast path: no processor depends on another one in the subset
+        if all(
+            not any(dep in proc_set for dep in self.get_dependencies(p))
+            for p in processors
+        ):
+            return list(processors)
+        
         # Build dependency graph
         in_degree = {p: 0 for p in processors}
         graph = {p: [] for p in processors}
         
         for proc in processors:
             for dep in self.get_dependencies(proc):
-                if dep in processors:
+                if dep in proc_set:
                     graph[dep].append(proc)
                     in_degree[proc] += 1
         
         # Kahn's algorithm
-        queue = [p for p in processors if in_degree[p] == 0]
+        queue = deque(p for p in processors if in_degree[p] == 0)
         result = []
         
         while queue:
-            node = queue.pop(0)
+            node = queue.popleft()
             result.append(node)
             
             for dependent in graph[node]:
@@ -211,7 +231,8 @@ class ProcessorRegistry:
         
         if len(result) != len(processors):
             # Circular dependency detected
-            remaining = [p for p in processors if p not in result]
+            done = set(result)
+            remaining = [p for p in processors if p not in done]
             raise ValueError(f"Circular dependency detected involving: {remaining}")
         
         return result
@@ -1,8 +1,8 @@
 """Storage layer for NoteFlow v2."""
 
 from .database import Database
-from .job_store import JobStore
+from .job_store import JobStore, JobSummary
 from .artifact_store import ArtifactStore
 
-__all__ = ["Database", "JobStore", "ArtifactStore"]
+__all__ = ["Database", "JobStore", "JobSummary", "ArtifactStore"]
 
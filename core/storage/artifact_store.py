@@ -1,12 +1,69 @@
 """Artifact storage layer."""
 
-from typing import Optional
+from contextlib import aclosing
+from typing import AsyncIterator, Final, Optional
 from datetime import datetime
 
-from .database import Database, serialize_json, deserialize_json
+from .database import (
+    Database,
+    serialize_json,
+    deserialize_json,
+    to_epoch_ms,
+    from_epoch_ms,
+)
 from ..models import Artifact, ArtifactType, ArtifactStatus
 
 
+_ARTIFACT_UPSERT_SQL: Final[str] = """
+INSERT INTO artifacts (
+    id, job_id, step_name, artifact_type, target,
+    before_state, after_state, metadata, status, reversibility,
+    error_message, created_at, reverted_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    status = excluded.status,
+    reversibility = excluded.reversibility,
+    error_message = excluded.error_message,
+    reverted_at = excluded.reverted_at
+"""
+
+# One row with a count column per status, so every status is always present
+_COUNT_BY_JOB_SQL: Final[str] = "SELECT {} FROM artifacts WHERE job_id = ?".format(", ".join(
+    f"COALESCE(SUM(CASE WHEN status = '{s.value}' THEN 1 ELSE 0 END), 0) AS {s.value}"
+    for s in ArtifactStatus
+))
+
+# Fixed column order for tuple rows, unpacked positionally by _tuple_to_artifact
+_ARTIFACT_COLUMNS: Final[str] = (
+    "id, job_id, step_name, artifact_type, target, before_state, after_state, "
+    "metadata, status, reversibility, error_message, created_at, reverted_at"
+)
+
+_LIST_BY_STEP_SQL: Final[str] = f"""
+SELECT {_ARTIFACT_COLUMNS} FROM artifacts
+WHERE job_id = ? AND step_name = ?
+ORDER BY created_at ASC
+"""
+
+_LIST_REVERSIBLE_SQL: Final[str] = f"""
+SELECT {_ARTIFACT_COLUMNS} FROM artifacts
+WHERE job_id = ?
+  AND status = 'created'
+  AND reversibility != 'irreversible'
+ORDER BY created_at DESC
+"""
+
+_HAS_REVERSIBLE_SQL: Final[str] = """
+SELECT 1 FROM artifacts
+WHERE job_id = ?
+  AND status = 'created'
+  AND reversibility != 'irreversible'
+LIMIT 1
+"""
+
+_TOTAL_BY_JOB_SQL: Final[str] = "SELECT COUNT(*) AS total FROM artifacts WHERE job_id = ?"
+
+
 class ArtifactStore:
     """
     Persistent storage for artifacts.
@@ -19,39 +76,16 @@ class ArtifactStore:
     
     async def save(self, artifact: Artifact) -> None:
         """Save an artifact (insert or update)."""
-        sql = """
-        INSERT INTO artifacts (
-            id, job_id, step_name, artifact_type, target,
-            before_state, after_state, metadata, status, reversibility,
-            error_message, created_at, reverted_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(id) DO UPDATE SET
-            status = excluded.status,
-            reversibility = excluded.reversibility,
-            error_message = excluded.error_message,
-            reverted_at = excluded.reverted_at
-        """
-        
-        await self.db.execute(sql, (
-            artifact.id,
-            artifact.job_id,
-            artifact.step_name,
-            artifact.artifact_type,
-            artifact.target,
-            artifact.before_state,
-            artifact.after_state,
-            serialize_json(artifact.metadata),
-            artifact.status,
-            artifact.reversibility,
-            artifact.error_message,
-            artifact.created_at.isoformat() if artifact.created_at else None,
-            artifact.reverted_at.isoformat() if artifact.reverted_at else None,
-        ))
+        await self.db.execute(_ARTIFACT_UPSERT_SQL, self._artifact_params(artifact))
     
     async def save_many(self, artifacts: list[Artifact]) -> None:
-        """Save multiple artifacts in a batch."""
-        for artifact in artifacts:
-            await self.save(artifact)
+        """Save multiple artifacts in a single transaction."""
+        if not artifacts:
+            return
+        
+        params_list = [self._artifact_params(a) for a in artifacts]
+        
+        await self.db.execute_bulk([(_ARTIFACT_UPSERT_SQL, params_list)])
     
     async def get(self, artifact_id: str) -> Optional[Artifact]:
         """Get an artifact by ID."""
@@ -71,13 +105,18 @@ class ArtifactStore:
         )
         return cursor.rowcount > 0
     
-    async def list_by_job(
+    async def iter_by_job(
         self,
         job_id: str,
         status: Optional[ArtifactStatus] = None,
-    ) -> list[Artifact]:
-        """Get all artifacts for a job."""
-        sql = "SELECT * FROM artifacts WHERE job_id = ?"
+    ) -> AsyncIterator[Artifact]:
+        """
+        Stream all artifacts for a job, one row at a time.
+        
+        Holds a read connection while iterating; wrap in contextlib.aclosing
+        when breaking out early so it is returned right away.
+        """
+        sql = f"SELECT {_ARTIFACT_COLUMNS} FROM artifacts WHERE job_id = ?"
         params = [job_id]
         
         if status:
@@ -86,46 +125,40 @@ class ArtifactStore:
         
         sql += " ORDER BY created_at ASC"
         
-        rows = await self.db.fetch_all(sql, tuple(params))
-        return [self._row_to_artifact(row) for row in rows]
+        # Closing this generator must close the inner one too
+        async with aclosing(self.db.iter_tuples(sql, tuple(params))) as rows:
+            async for row in rows:
+                yield self._tuple_to_artifact(row)
+    
+    async def list_by_job(
+        self,
+        job_id: str,
+        status: Optional[ArtifactStatus] = None,
+    ) -> list[Artifact]:
+        """Get all artifacts for a job."""
+        return [a async for a in self.iter_by_job(job_id, status)]
     
     async def list_by_step(self, job_id: str, step_name: str) -> list[Artifact]:
         """Get all artifacts for a specific step of a job."""
-        rows = await self.db.fetch_all(
-            """
-            SELECT * FROM artifacts 
-            WHERE job_id = ? AND step_name = ?
-            ORDER BY created_at ASC
-            """,
-            (job_id, step_name)
-        )
-        return [self._row_to_artifact(row) for row in rows]
+        rows = await self.db.fetch_all_tuples(_LIST_BY_STEP_SQL, (job_id, step_name))
+        return [self._tuple_to_artifact(row) for row in rows]
     
     async def list_reversible_by_job(self, job_id: str) -> list[Artifact]:
         """Get all reversible artifacts for a job (in reverse order for undo)."""
-        rows = await self.db.fetch_all(
-            """
-            SELECT * FROM artifacts 
-            WHERE job_id = ? 
-              AND status = 'created' 
-              AND reversibility != 'irreversible'
-            ORDER BY created_at DESC
-            """,
-            (job_id,)
-        )
-        return [self._row_to_artifact(row) for row in rows]
+        rows = await self.db.fetch_all_tuples(_LIST_REVERSIBLE_SQL, (job_id,))
+        return [self._tuple_to_artifact(row) for row in rows]
     
     async def list_by_target(self, target: str) -> list[Artifact]:
         """Get all artifacts affecting a specific target (file path, API endpoint)."""
-        rows = await self.db.fetch_all(
-            "SELECT * FROM artifacts WHERE target = ? ORDER BY created_at DESC",
+        rows = await self.db.fetch_all_tuples(
+            f"SELECT {_ARTIFACT_COLUMNS} FROM artifacts WHERE target = ? ORDER BY created_at DESC",
             (target,)
         )
-        return [self._row_to_artifact(row) for row in rows]
+        return [self._tuple_to_artifact(row) for row in rows]
     
     async def mark_reverted(self, artifact_id: str) -> None:
         """Mark an artifact as reverted."""
-        now = datetime.utcnow().isoformat()
+        now = to_epoch_ms(datetime.utcnow())
         await self.db.execute(
             "UPDATE artifacts SET status = 'reverted', reverted_at = ? WHERE id = ?",
             (now, artifact_id)
@@ -139,27 +172,34 @@ class ArtifactStore:
         )
     
     async def mark_irreversible(self, artifact_id: str, reason: Optional[str] = None) -> None:
-        """Mark an artifact as irreversible."""
-        metadata = {}
-        if reason:
-            metadata["irreversible_reason"] = reason
+        """Mark an artifact as irreversible, keeping its existing metadata."""
+        patch = {"irreversible_reason": reason} if reason else {}
         
         await self.db.execute(
             """
             UPDATE artifacts 
-            SET status = 'irreversible', reversibility = 'irreversible', metadata = ?
+            SET status = 'irreversible',
+                reversibility = 'irreversible',
+                metadata = json_patch(COALESCE(metadata, '{}'), ?)
             WHERE id = ?
             """,
-            (serialize_json(metadata), artifact_id)
+            (serialize_json(patch), artifact_id)
         )
     
     async def count_by_job(self, job_id: str) -> dict[str, int]:
-        """Get artifact counts by status for a job."""
-        rows = await self.db.fetch_all(
-            "SELECT status, COUNT(*) as count FROM artifacts WHERE job_id = ? GROUP BY status",
-            (job_id,)
-        )
-        return {row["status"]: row["count"] for row in rows}
+        """Get artifact counts for every status for a job (zero when absent)."""
+        row = await self.db.fetch_one(_COUNT_BY_JOB_SQL, (job_id,))
+        return row or {s.value: 0 for s in ArtifactStatus}
+    
+    async def has_reversible(self, job_id: str) -> bool:
+        """Check whether a job has any artifact that can still be reverted."""
+        row = await self.db.fetch_one(_HAS_REVERSIBLE_SQL, (job_id,))
+        return row is not None
+    
+    async def total_by_job(self, job_id: str) -> int:
+        """Get the total number of artifacts for a job."""
+        row = await self.db.fetch_one(_TOTAL_BY_JOB_SQL, (job_id,))
+        return row["total"]
     
     async def delete_by_job(self, job_id: str) -> int:
         """Delete all artifacts for a job. Returns count deleted."""
@@ -169,13 +209,26 @@ class ArtifactStore:
         )
         return cursor.rowcount
     
+    def _artifact_params(self, artifact: Artifact) -> tuple:
+        """Build the parameter tuple for _ARTIFACT_UPSERT_SQL."""
+        return (
+            artifact.id,
+            artifact.job_id,
+            artifact.step_name,
+            artifact.artifact_type,
+            artifact.target,
+            artifact.before_state,
+            artifact.after_state,
+            serialize_json(artifact.metadata),
+            artifact.status,
+            artifact.reversibility,
+            artifact.error_message,
+            to_epoch_ms(artifact.created_at),
+            to_epoch_ms(artifact.reverted_at),
+        )
+    
     def _row_to_artifact(self, row: dict) -> Artifact:
         """Convert a database row to an Artifact object."""
-        def parse_datetime(val):
-            if val:
-                return datetime.fromisoformat(val)
-            return None
-        
         return Artifact(
             id=row["id"],
             job_id=row["job_id"],
@@ -188,7 +241,33 @@ class ArtifactStore:
             status=row["status"],
             reversibility=row["reversibility"],
             error_message=row.get("error_message"),
-            created_at=parse_datetime(row.get("created_at")) or datetime.utcnow(),
-            reverted_at=parse_datetime(row.get("reverted_at")),
+            created_at=from_epoch_ms(row.get("created_at")) or datetime.utcnow(),
+            reverted_at=from_epoch_ms(row.get("reverted_at")),
+        )
+    
+    def _tuple_to_artifact(self, row: tuple) -> Artifact:
+        """
+        Convert a tuple row in _ARTIFACT_COLUMNS order to an Artifact.
+        
+        Uses model_construct to skip validation; the values were validated
+        when the artifact was saved.
+        """
+        (
+            id, job_id, step_name, artifact_type, target, before_state, after_state,
+            metadata, status, reversibility, error_message, created_at, reverted_at,
+        ) = row
+        return Artifact.model_construct(
+            id=id,
+            job_id=job_id,
+            step_name=step_name,
+            artifact_type=artifact_type,
+            target=target,
+            before_state=before_state,
+            after_state=after_state,
+            metadata=deserialize_json(metadata, {}),
+            status=status,
+            reversibility=reversibility,
+            error_message=error_message,
+            created_at=from_epoch_ms(created_at) or datetime.utcnow(),
+            reverted_at=from_epoch_ms(reverted_at),
         )
-
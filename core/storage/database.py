@@ -1,13 +1,24 @@
 """SQLite database connection and schema management."""
 
 import aiosqlite
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Callable, Optional, TypeVar
 import json
 import logging
+import sqlite3
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, stdlib json is the fallback
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 # SQL schema for jobs table
 JOBS_SCHEMA = """
@@ -26,15 +37,17 @@ CREATE TABLE IF NOT EXISTS jobs (
     tags TEXT DEFAULT '[]',
     priority INTEGER DEFAULT 0,
     error_message TEXT,
-    created_at TEXT NOT NULL,
-    started_at TEXT,
-    completed_at TEXT,
-    updated_at TEXT NOT NULL
+    created_at INTEGER NOT NULL,
+    started_at INTEGER,
+    completed_at INTEGER,
+    updated_at INTEGER NOT NULL
 );
 
 CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
 CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
 CREATE INDEX IF NOT EXISTS idx_jobs_priority ON jobs(priority DESC, created_at ASC);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_priority_created
+    ON jobs(status, priority DESC, created_at ASC);
 """
 
 # SQL schema for artifacts table
@@ -51,14 +64,17 @@ CREATE TABLE IF NOT EXISTS artifacts (
     status TEXT NOT NULL DEFAULT 'pending',
     reversibility TEXT NOT NULL DEFAULT 'fully_reversible',
     error_message TEXT,
-    created_at TEXT NOT NULL,
-    reverted_at TEXT,
+    created_at INTEGER NOT NULL,
+    reverted_at INTEGER,
     FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE
 );
 
 CREATE INDEX IF NOT EXISTS idx_artifacts_job_id ON artifacts(job_id);
 CREATE INDEX IF NOT EXISTS idx_artifacts_step_name ON artifacts(step_name);
 CREATE INDEX IF NOT EXISTS idx_artifacts_status ON artifacts(status);
+CREATE INDEX IF NOT EXISTS idx_artifacts_job_status_created
+    ON artifacts(job_id, status, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_artifacts_target ON artifacts(target, created_at DESC);
 """
 
 # SQL schema for step_results table (for faster queries)
@@ -68,15 +84,17 @@ CREATE TABLE IF NOT EXISTS step_results (
     job_id TEXT NOT NULL,
     step_name TEXT NOT NULL,
     status TEXT NOT NULL DEFAULT 'pending',
-    started_at TEXT,
-    completed_at TEXT,
+    started_at INTEGER,
+    completed_at INTEGER,
     output_data TEXT DEFAULT '{}',
     error_message TEXT,
     error_traceback TEXT,
-    awaiting_input_since TEXT,
+    awaiting_input_since INTEGER,
     user_input TEXT,
-    reverted_at TEXT,
+    reverted_at INTEGER,
     revert_error TEXT,
+    message TEXT,
+    artifacts TEXT DEFAULT '[]',
     FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE
 );
 
@@ -85,16 +103,39 @@ CREATE INDEX IF NOT EXISTS idx_step_results_status ON step_results(status);
 """
 
 
+# Datetime columns, stored as INTEGER milliseconds since the Unix epoch (UTC)
+DATETIME_COLUMNS = {
+    "jobs": ("created_at", "started_at", "completed_at", "updated_at"),
+    "artifacts": ("created_at", "reverted_at"),
+    "step_results": ("started_at", "completed_at", "awaiting_input_since", "reverted_at"),
+}
+
+# Bumped whenever _migrate() learns a new step
+SCHEMA_VERSION = 4
+
+
 class Database:
     """
     Async SQLite database connection manager.
     
-    Provides connection pooling and schema management.
+    Provides connection pooling and schema management. Writes go through a
+    single connection; reads are spread over a pool of read-only connections
+    so concurrent queries don't queue behind each other.
     """
     
-    def __init__(self, db_path: Path | str = "noteflow.db"):
+    def __init__(self, db_path: Path | str = "noteflow.db", read_pool_size: int = 4):
         self.db_path = Path(db_path)
+        self.read_pool_size = read_pool_size
         self._connection: Optional[aiosqlite.Connection] = None
+        self._read_pool: Optional[asyncio.Queue[aiosqlite.Connection]] = None
+        self._read_connections: list[aiosqlite.Connection] = []
+        self._sync_connection: Optional[sqlite3.Connection] = None
+        self._sync_lock = asyncio.Lock()
+        # Held by a task for its whole transaction on the writer, and briefly
+        # by every other write, so tasks never interleave inside one another's
+        # BEGIN ... COMMIT
+        self._write_lock = asyncio.Lock()
+        self._transaction_task: Optional[asyncio.Task] = None
     
     async def connect(self) -> None:
         """Establish database connection and initialize schema."""
@@ -109,6 +150,7 @@ class Database:
             self.db_path,
             isolation_level=None,  # Autocommit mode
         )
+        self._connection.row_factory = aiosqlite.Row
         
         # Enable foreign keys
         await self._connection.execute("PRAGMA foreign_keys = ON")
@@ -116,22 +158,188 @@ class Database:
         # Enable WAL mode for better concurrency
         await self._connection.execute("PRAGMA journal_mode = WAL")
         
+        # WAL is crash-safe with NORMAL sync; only a power loss can drop
+        # the last few commits. Keep temp tables and a 64 MiB cache in memory.
+        await self._connection.execute("PRAGMA synchronous = NORMAL")
+        await self._connection.execute("PRAGMA temp_store = MEMORY")
+        await self._connection.execute("PRAGMA cache_size = -64000")
+        await self._connection.execute("PRAGMA mmap_size = 268435456")
+        await self._connection.execute("PRAGMA wal_autocheckpoint = 1000")
+        
         # Initialize schema
         await self._init_schema()
         
+        await self._migrate()
+        
+        # Open read connections once the schema exists
+        await self._open_read_pool()
+        
+        await asyncio.to_thread(self._open_sync_connection)
+        
         logger.info("Database connected and schema initialized")
     
+    async def _open_read_pool(self) -> None:
+        """Open the pool of read-only connections."""
+        if self.read_pool_size <= 0:
+            return
+        
+        self._read_pool = asyncio.Queue(maxsize=self.read_pool_size)
+        for _ in range(self.read_pool_size):
+            conn = await aiosqlite.connect(self.db_path, isolation_level=None)
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("PRAGMA query_only = ON")
+            await conn.execute("PRAGMA journal_mode = WAL")
+            await conn.execute("PRAGMA synchronous = NORMAL")
+            self._read_connections.append(conn)
+            self._read_pool.put_nowait(conn)
+    
     async def _init_schema(self) -> None:
         """Create tables if they don't exist."""
-        async with self._connection.executescript(JOBS_SCHEMA):
-            pass
-        async with self._connection.executescript(ARTIFACTS_SCHEMA):
-            pass
-        async with self._connection.executescript(STEP_RESULTS_SCHEMA):
-            pass
+        await self._connection.executescript(
+            JOBS_SCHEMA + ARTIFACTS_SCHEMA + STEP_RESULTS_SCHEMA
+        )
+    
+    async def _migrate(self) -> None:
+        """Bring an existing database file up to SCHEMA_VERSION."""
+        async with self._connection.execute("PRAGMA user_version") as cursor:
+            (version,) = await cursor.fetchone()
+        
+        if version >= SCHEMA_VERSION:
+            return
+        
+        # Version 3 created these WITHOUT ROWID; their rows hold file contents,
+        # which are cheaper to keep in a rowid table
+        rebuild = []
+        if version < 4:
+            for table, schema in (("jobs", JOBS_SCHEMA), ("artifacts", ARTIFACTS_SCHEMA)):
+                if await self._is_without_rowid(table):
+                    rebuild.append((table, schema))
+        
+        # Dropping the old jobs table would otherwise cascade to its children
+        if rebuild:
+            await self._connection.execute("PRAGMA foreign_keys = OFF")
+        
+        try:
+            await self._migrate_steps(version, rebuild)
+        finally:
+            if rebuild:
+                await self._connection.execute("PRAGMA foreign_keys = ON")
+        
+        if rebuild:
+            # Recreate the indexes that were dropped with the old tables
+            await self._init_schema()
+        
+        logger.info(f"Migrated database schema from version {version} to {SCHEMA_VERSION}")
+    
+    async def _migrate_steps(self, version: int, rebuild: list[tuple[str, str]]) -> None:
+        """Run the migration steps after `version` in one transaction."""
+        async with self.transaction():
+            if version < 1:
+                # ISO-8601 TEXT datetimes -> epoch milliseconds
+                for table, columns in DATETIME_COLUMNS.items():
+                    for column in columns:
+                        await self._connection.execute(
+                            f"UPDATE {table} SET {column} = "
+                            f"CAST(ROUND((julianday({column}) - 2440587.5) * 86400000) AS INTEGER) "
+                            f"WHERE typeof({column}) = 'text' AND julianday({column}) IS NOT NULL"
+                        )
+            if version < 2:
+                await self._migrate_history_to_step_results()
+            for table, schema in rebuild:
+                await self._rebuild_table(table, schema)
+            await self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    async def _is_without_rowid(self, table: str) -> bool:
+        """Check whether an existing table was created WITHOUT ROWID."""
+        async with self._connection.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        return row is not None and "WITHOUT ROWID" in row["sql"].upper()
+    
+    async def _rebuild_table(self, table: str, schema: str) -> None:
+        """Copy a table into its current definition."""
+        create_sql = schema.split(";", 1)[0].replace(
+            f"CREATE TABLE IF NOT EXISTS {table} (",
+            f"CREATE TABLE {table}_new (",
+        )
+        await self._connection.execute(create_sql)
+        
+        async with self._connection.execute(f"PRAGMA table_info({table})") as cursor:
+            columns = ", ".join(row["name"] for row in await cursor.fetchall())
+        
+        await self._connection.execute(
+            f"INSERT INTO {table}_new ({columns}) SELECT {columns} FROM {table}"
+        )
+        await self._connection.execute(f"DROP TABLE {table}")
+        await self._connection.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    
+    async def _migrate_history_to_step_results(self) -> None:
+        """Move StepResults out of the jobs.history JSON column into step_results."""
+        async with self._connection.execute("PRAGMA table_info(step_results)") as cursor:
+            existing = {row["name"] for row in await cursor.fetchall()}
+        if "message" not in existing:
+            await self._connection.execute("ALTER TABLE step_results ADD COLUMN message TEXT")
+        if "artifacts" not in existing:
+            await self._connection.execute(
+                "ALTER TABLE step_results ADD COLUMN artifacts TEXT DEFAULT '[]'"
+            )
+        
+        def epoch_ms(field: str) -> str:
+            value = f"json_extract(h.value, '$.{field}')"
+            return f"CAST(ROUND((julianday({value}) - 2440587.5) * 86400000) AS INTEGER)"
+        
+        await self._connection.execute(f"""
+            INSERT OR IGNORE INTO step_results (
+                id, job_id, step_name, status, started_at, completed_at,
+                output_data, error_message, error_traceback, awaiting_input_since,
+                user_input, reverted_at, revert_error, message, artifacts
+            )
+            SELECT
+                json_extract(h.value, '$.id'),
+                jobs.id,
+                json_extract(h.value, '$.step_name'),
+                json_extract(h.value, '$.status'),
+                {epoch_ms("started_at")},
+                {epoch_ms("completed_at")},
+                COALESCE(json_extract(h.value, '$.output_data'), '{{}}'),
+                json_extract(h.value, '$.error_message'),
+                json_extract(h.value, '$.error_traceback'),
+                {epoch_ms("awaiting_input_since")},
+                json_extract(h.value, '$.user_input'),
+                {epoch_ms("reverted_at")},
+                json_extract(h.value, '$.revert_error'),
+                json_extract(h.value, '$.message'),
+                COALESCE(json_extract(h.value, '$.artifacts'), '[]')
+            FROM jobs, json_each(jobs.history) AS h
+            WHERE json_valid(jobs.history)
+            ORDER BY jobs.id, h.key
+        """)
+        await self._connection.execute("UPDATE jobs SET history = '[]' WHERE history != '[]'")
+    
+    def _open_sync_connection(self) -> None:
+        """Open the blocking connection used by _execute_bulk_sync."""
+        self._sync_connection = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            check_same_thread=False,  # Used from worker threads, one at a time
+        )
+        self._sync_connection.execute("PRAGMA foreign_keys = ON")
+        self._sync_connection.execute("PRAGMA journal_mode = WAL")
+        self._sync_connection.execute("PRAGMA synchronous = NORMAL")
     
     async def close(self) -> None:
         """Close database connection."""
+        for conn in self._read_connections:
+            await conn.close()
+        self._read_connections.clear()
+        self._read_pool = None
+        
+        if self._sync_connection is not None:
+            self._sync_connection.close()
+            self._sync_connection = None
+        
         if self._connection is not None:
             await self._connection.close()
             self._connection = None
@@ -144,29 +352,163 @@ class Database:
             raise RuntimeError("Database not connected. Call connect() first.")
         return self._connection
     
+    def _in_own_transaction(self) -> bool:
+        """Whether the calling task has a transaction open on the writer."""
+        return (
+            self._transaction_task is not None
+            and self._transaction_task is asyncio.current_task()
+        )
+    
     async def execute(self, sql: str, params: tuple = ()) -> aiosqlite.Cursor:
         """Execute a SQL statement."""
-        return await self.connection.execute(sql, params)
+        if self._in_own_transaction():
+            return await self.connection.execute(sql, params)
+        async with self._write_lock:
+            return await self.connection.execute(sql, params)
     
     async def execute_many(self, sql: str, params_list: list[tuple]) -> None:
         """Execute a SQL statement with multiple parameter sets."""
-        await self.connection.executemany(sql, params_list)
+        if self._in_own_transaction():
+            await self.connection.executemany(sql, params_list)
+            return
+        async with self._write_lock:
+            await self.connection.executemany(sql, params_list)
+    
+    async def _execute_bulk_sync(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """
+        Run `fn` in one transaction on a blocking sqlite3 connection.
+        
+        The whole call takes a single thread round-trip, where aiosqlite
+        takes one per statement. The caller must hold _write_lock: an open
+        transaction() on the writer would otherwise make BEGIN IMMEDIATE
+        block and then fail with SQLITE_BUSY.
+        
+        Args:
+            fn: Called with the sqlite3 connection from a worker thread
+            
+        Returns:
+            Whatever `fn` returns
+        """
+        if self._sync_connection is None:
+            raise RuntimeError("Database not connected. Call connect() first.")
+        
+        def run(conn: sqlite3.Connection) -> T:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            return result
+        
+        async with self._sync_lock:
+            return await asyncio.to_thread(run, self._sync_connection)
+    
+    async def execute_bulk(self, statements: list[tuple[str, list[tuple]]]) -> None:
+        """
+        Run several executemany() statements in one transaction.
+        
+        Runs on the blocking connection, unless the calling task has a transaction
+        open on the writer: then the statements join it, so they commit or
+        roll back together with the surrounding writes. Another task's open
+        transaction is waited for, never joined.
+        """
+        if self._in_own_transaction():
+            for sql, params_list in statements:
+                await self.connection.executemany(sql, params_list)
+            return
+        
+        def run(conn: sqlite3.Connection) -> None:
+            for sql, params_list in statements:
+                conn.executemany(sql, params_list)
+        
+        # Wait our turn here rather than on SQLite's busy timeout
+        async with self._write_lock:
+            await self._execute_bulk_sync(run)
+    
+    @asynccontextmanager
+    async def _acquire_read(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Borrow a connection for a read query.
+        
+        Falls back to the writer when the pool is disabled or the calling
+        task has a transaction open, so reads inside a transaction see its
+        uncommitted writes.
+        """
+        if self._read_pool is None or self._in_own_transaction():
+            yield self.connection
+            return
+        
+        pool = self._read_pool
+        conn = await pool.get()
+        try:
+            yield conn
+        finally:
+            pool.put_nowait(conn)
     
     async def fetch_one(self, sql: str, params: tuple = ()) -> Optional[dict]:
         """Fetch a single row as a dictionary."""
-        self.connection.row_factory = aiosqlite.Row
-        async with self.connection.execute(sql, params) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                return dict(row)
-            return None
+        async with self._acquire_read() as conn:
+            async with conn.execute(sql, params) as cursor:
+                row = await cursor.fetchone()
+                if row:
+                    return dict(row)
+                return None
     
     async def fetch_all(self, sql: str, params: tuple = ()) -> list[dict]:
         """Fetch all rows as dictionaries."""
-        self.connection.row_factory = aiosqlite.Row
-        async with self.connection.execute(sql, params) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        async with self._acquire_read() as conn:
+            async with conn.execute(sql, params) as cursor:
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows]
+    
+    async def fetch_all_tuples(self, sql: str, params: tuple = ()) -> list[tuple]:
+        """Fetch all rows as plain tuples in SELECT column order."""
+        async with self._acquire_read() as conn:
+            async with conn.execute(sql, params) as cursor:
+                cursor.row_factory = None
+                return await cursor.fetchall()
+    
+    async def iter_tuples(self, sql: str, params: tuple = ()) -> AsyncIterator[tuple]:
+        """
+        Stream rows as plain tuples in SELECT column order.
+        
+        The connection stays checked out until the iterator finishes or is
+        closed, so a caller that may stop early should wrap it in
+        contextlib.aclosing rather than leave it for garbage collection.
+        """
+        async with self._acquire_read() as conn:
+            async with conn.execute(sql, params) as cursor:
+                cursor.row_factory = None
+                async for row in cursor:
+                    yield row
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """
+        Group writes into one transaction, rolling back on error.
+        
+        Nested use within the same task joins the outer transaction instead
+        of starting a new one. Other tasks wait until it has committed or
+        rolled back, so their writes are never part of it.
+        """
+        if self._in_own_transaction():
+            yield
+            return
+        
+        async with self._write_lock:
+            self._transaction_task = asyncio.current_task()
+            try:
+                await self.begin_transaction()
+                try:
+                    yield
+                except BaseException:
+                    await self.rollback()
+                    raise
+                await self.commit()
+            finally:
+                self._transaction_task = None
     
     async def begin_transaction(self) -> None:
         """Begin an explicit transaction."""
@@ -183,17 +525,60 @@ class Database:
 
 # Utility functions for JSON serialization in SQLite
 
-def serialize_json(data) -> str:
-    """Serialize data to JSON string for storage."""
-    return json.dumps(data, default=str)
+if orjson is not None:
+    # Pass datetimes through to default=str so output matches stdlib json
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    
+    def serialize_json(data) -> str:
+        """Serialize data to JSON string for storage."""
+        return orjson.dumps(data, default=str, option=_ORJSON_OPTIONS).decode()
+    
+    def deserialize_json(data: Optional[str], default=None):
+        """Deserialize JSON string from storage."""
+        if data is None:
+            return default
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return default
+
+else:
+    def serialize_json(data) -> str:
+        """Serialize data to JSON string for storage."""
+        return json.dumps(data, default=str)
+    
+    def deserialize_json(data: Optional[str], default=None):
+        """Deserialize JSON string from storage."""
+        if data is None:
+            return default
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError:
+            return default
+
+
+# Utility functions for datetime columns in SQLite
+#
+# Datetimes are naive UTC throughout the models (datetime.utcnow), so they
+# are converted against a naive epoch rather than via timestamp(), which
+# would assume local time.
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MS = timedelta(milliseconds=1)
+
 
+def to_epoch_ms(dt: Optional[datetime]) -> Optional[int]:
+    """Convert a datetime to epoch milliseconds for storage."""
+    if dt is None:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - _EPOCH) // _ONE_MS
 
-def deserialize_json(data: Optional[str], default=None):
-    """Deserialize JSON string from storage."""
-    if data is None:
-        return default
-    try:
-        return json.loads(data)
-    except json.JSONDecodeError:
-        return default
 
+def from_epoch_ms(val: Optional[int]) -> Optional[datetime]:
+    """Convert stored epoch milliseconds back to a naive UTC datetime."""
+    if val is None or val == "":
+        return None
+    # int() also accepts the digit strings kept by pre-migration TEXT columns
+    return _EPOCH + timedelta(milliseconds=int(val))
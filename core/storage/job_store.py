@@ -1,13 +1,127 @@
 """Job storage layer."""
 
-from typing import Optional
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Final, Optional
 from datetime import datetime
 import json
 
-from .database import Database, serialize_json, deserialize_json
+from .database import (
+    Database,
+    serialize_json,
+    deserialize_json,
+    to_epoch_ms,
+    from_epoch_ms,
+)
 from ..models import Job, JobStatus, StepResult
 
 
+_JOB_UPSERT_SQL: Final[str] = """
+INSERT INTO jobs (
+    id, source_type, source_path, source_url, source_name,
+    status, current_step, next_step, data, config, tags,
+    priority, error_message, created_at, started_at, completed_at, updated_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    source_type = excluded.source_type,
+    source_path = excluded.source_path,
+    source_url = excluded.source_url,
+    source_name = excluded.source_name,
+    status = excluded.status,
+    current_step = excluded.current_step,
+    next_step = excluded.next_step,
+    data = excluded.data,
+    config = excluded.config,
+    tags = excluded.tags,
+    priority = excluded.priority,
+    error_message = excluded.error_message,
+    started_at = excluded.started_at,
+    completed_at = excluded.completed_at,
+    updated_at = excluded.updated_at
+"""
+
+# Job history lives in step_results; upserting by id lets a result that
+# was stored while awaiting input be updated when it is resumed
+_STEP_RESULT_UPSERT_SQL: Final[str] = """
+INSERT INTO step_results (
+    id, job_id, step_name, message, status, started_at, completed_at,
+    output_data, error_message, error_traceback, awaiting_input_since,
+    user_input, reverted_at, revert_error, artifacts
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    message = excluded.message,
+    status = excluded.status,
+    started_at = excluded.started_at,
+    completed_at = excluded.completed_at,
+    output_data = excluded.output_data,
+    error_message = excluded.error_message,
+    error_traceback = excluded.error_traceback,
+    awaiting_input_since = excluded.awaiting_input_since,
+    user_input = excluded.user_input,
+    reverted_at = excluded.reverted_at,
+    revert_error = excluded.revert_error,
+    artifacts = excluded.artifacts
+"""
+
+_STEP_RESULT_COLUMNS: Final[str] = (
+    "id, job_id, step_name, message, status, started_at, completed_at, "
+    "output_data, error_message, error_traceback, awaiting_input_since, "
+    "user_input, reverted_at, revert_error, artifacts"
+)
+
+# Job IDs per step_results query (stays under SQLite's bound-parameter limit)
+_HISTORY_CHUNK_SIZE: Final[int] = 500
+
+_LIST_PENDING_SQL: Final[str] = """
+SELECT * FROM jobs
+WHERE status = 'pending'
+ORDER BY priority DESC, created_at ASC
+LIMIT ?
+"""
+
+_LIST_PENDING_IDS_SQL: Final[str] = """
+SELECT id, priority, created_at FROM jobs
+WHERE status = 'pending'
+ORDER BY priority DESC, created_at ASC
+LIMIT ?
+"""
+
+_LIST_ACTIVE_SQL: Final[str] = """
+SELECT * FROM jobs
+WHERE status IN ('pending', 'processing', 'awaiting_input')
+ORDER BY priority DESC, created_at ASC
+"""
+
+# One row with a count column per status, so every status is always present
+_COUNT_BY_STATUS_SQL: Final[str] = "SELECT {} FROM jobs".format(", ".join(
+    f"COALESCE(SUM(CASE WHEN status = '{s.value}' THEN 1 ELSE 0 END), 0) AS {s.value}"
+    for s in JobStatus
+))
+
+# Columns list_all may sort by (validated to prevent SQL injection)
+_ORDERABLE_COLUMNS: Final[frozenset[str]] = frozenset(
+    {"created_at", "updated_at", "priority", "status"}
+)
+
+# Columns needed for a JobSummary (skips the wide JSON columns)
+_SUMMARY_COLUMNS: Final[str] = (
+    "id, source_name, source_path, status, priority, current_step, next_step, created_at"
+)
+
+
+@dataclass
+class JobSummary:
+    """Lightweight view of a job for listings and scheduling."""
+    id: str
+    source_name: str
+    source_path: Optional[str]
+    status: str
+    priority: int
+    current_step: Optional[str]
+    next_step: Optional[str]
+    created_at: Optional[datetime]
+
+
 class JobStore:
     """
     Persistent storage for jobs.
@@ -19,55 +133,64 @@ class JobStore:
         self.db = database
     
     async def save(self, job: Job) -> None:
-        """Save a job (insert or update)."""
-        # Serialize history (list of StepResult)
-        history_json = serialize_json([r.model_dump() for r in job.history])
-        
-        sql = """
-        INSERT INTO jobs (
-            id, source_type, source_path, source_url, source_name,
-            status, current_step, next_step, data, history, config, tags,
-            priority, error_message, created_at, started_at, completed_at, updated_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(id) DO UPDATE SET
-            source_type = excluded.source_type,
-            source_path = excluded.source_path,
-            source_url = excluded.source_url,
-            source_name = excluded.source_name,
-            status = excluded.status,
-            current_step = excluded.current_step,
-            next_step = excluded.next_step,
-            data = excluded.data,
-            history = excluded.history,
-            config = excluded.config,
-            tags = excluded.tags,
-            priority = excluded.priority,
-            error_message = excluded.error_message,
-            started_at = excluded.started_at,
-            completed_at = excluded.completed_at,
-            updated_at = excluded.updated_at
         """
+        Save a job (insert or update).
         
-        await self.db.execute(sql, (
-            job.id,
-            job.source_type,
-            job.source_path,
-            job.source_url,
-            job.source_name,
-            job.status,
-            job.current_step,
-            job.next_step,
-            serialize_json(job.data),
-            history_json,
-            serialize_json(job.config),
-            serialize_json(job.tags),
-            job.priority,
-            job.error_message,
-            job.created_at.isoformat() if job.created_at else None,
-            job.started_at.isoformat() if job.started_at else None,
-            job.completed_at.isoformat() if job.completed_at else None,
-            job.updated_at.isoformat() if job.updated_at else None,
-        ))
+        Only history entries appended since the job was loaded or last saved
+        are written. Use save_step_result() after changing an older entry.
+        """
+        new_results = job.history[job._persisted_history:]
+        if not new_results:
+            await self.db.execute(_JOB_UPSERT_SQL, self._job_params(job))
+            return
+        
+        async with self.db.transaction():
+            await self.db.execute(_JOB_UPSERT_SQL, self._job_params(job))
+            await self.db.execute_many(
+                _STEP_RESULT_UPSERT_SQL,
+                [self._step_result_params(job.id, r) for r in new_results],
+            )
+        job._persisted_history = len(job.history)
+    
+    async def save_many(self, jobs: list[Job]) -> None:
+        """Save multiple jobs in a single transaction."""
+        if not jobs:
+            return
+        
+        params_list = [self._job_params(job) for job in jobs]
+        step_params = [
+            self._step_result_params(job.id, r)
+            for job in jobs
+            for r in job.history[job._persisted_history:]
+        ]
+        
+        statements = [(_JOB_UPSERT_SQL, params_list)]
+        if step_params:
+            statements.append((_STEP_RESULT_UPSERT_SQL, step_params))
+        await self.db.execute_bulk(statements)
+        
+        for job in jobs:
+            job._persisted_history = len(job.history)
+    
+    async def save_step_result(self, job_id: str, result: StepResult) -> None:
+        """Save a single history entry, e.g. after it was reverted."""
+        await self.db.execute(
+            _STEP_RESULT_UPSERT_SQL,
+            self._step_result_params(job_id, result),
+        )
+    
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator["JobStore"]:
+        """
+        Group several writes into one transaction.
+        
+        Usage:
+            async with job_store.batch():
+                await job_store.save(job)
+                await job_store.update_status(other_id, JobStatus.CANCELLED)
+        """
+        async with self.db.transaction():
+            yield self
     
     async def get(self, job_id: str) -> Optional[Job]:
         """Get a job by ID."""
@@ -76,7 +199,9 @@ class JobStore:
             (job_id,)
         )
         if row:
-            return self._row_to_job(row)
+            job = self._row_to_job(row)
+            await self._load_history([job])
+            return job
         return None
     
     async def delete(self, job_id: str) -> bool:
@@ -104,8 +229,7 @@ class JobStore:
             params.append(status.value if isinstance(status, JobStatus) else status)
         
         # Validate order_by to prevent SQL injection
-        valid_columns = ["created_at", "updated_at", "priority", "status"]
-        if order_by not in valid_columns:
+        if order_by not in _ORDERABLE_COLUMNS:
             order_by = "created_at"
         
         order_dir = "DESC" if order_dir.upper() == "DESC" else "ASC"
@@ -114,49 +238,54 @@ class JobStore:
         params.extend([limit, offset])
         
         rows = await self.db.fetch_all(sql, tuple(params))
-        return [self._row_to_job(row) for row in rows]
+        return await self._rows_to_jobs(rows)
     
     async def list_pending(self, limit: int = 50) -> list[Job]:
         """Get pending jobs ordered by priority."""
-        rows = await self.db.fetch_all(
-            """
-            SELECT * FROM jobs 
-            WHERE status = 'pending'
-            ORDER BY priority DESC, created_at ASC
-            LIMIT ?
-            """,
-            (limit,)
-        )
-        return [self._row_to_job(row) for row in rows]
+        rows = await self.db.fetch_all(_LIST_PENDING_SQL, (limit,))
+        return await self._rows_to_jobs(rows)
+    
+    async def list_pending_ids(self, limit: int = 50) -> list[str]:
+        """Get IDs of pending jobs ordered by priority."""
+        rows = await self.db.fetch_all(_LIST_PENDING_IDS_SQL, (limit,))
+        return [row["id"] for row in rows]
+    
+    async def list_summaries(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        status: Optional[JobStatus] = None,
+    ) -> list[JobSummary]:
+        """List job summaries (newest first) without loading full jobs."""
+        sql = f"SELECT {_SUMMARY_COLUMNS} FROM jobs"
+        params = []
+        
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status.value if isinstance(status, JobStatus) else status)
+        
+        sql += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        
+        rows = await self.db.fetch_all(sql, tuple(params))
+        return [self._row_to_summary(row) for row in rows]
     
     async def list_awaiting_input(self) -> list[Job]:
         """Get all jobs waiting for user input."""
         rows = await self.db.fetch_all(
             "SELECT * FROM jobs WHERE status = 'awaiting_input' ORDER BY updated_at ASC"
         )
-        return [self._row_to_job(row) for row in rows]
+        return await self._rows_to_jobs(rows)
     
     async def list_active(self) -> list[Job]:
         """Get all active (non-terminal) jobs."""
-        rows = await self.db.fetch_all(
-            """
-            SELECT * FROM jobs 
-            WHERE status IN ('pending', 'processing', 'awaiting_input')
-            ORDER BY priority DESC, created_at ASC
-            """
-        )
-        return [self._row_to_job(row) for row in rows]
+        rows = await self.db.fetch_all(_LIST_ACTIVE_SQL)
+        return await self._rows_to_jobs(rows)
     
     async def count_by_status(self) -> dict[str, int]:
-        """Get count of jobs by status."""
-        rows = await self.db.fetch_all(
-            "SELECT status, COUNT(*) as count FROM jobs GROUP BY status"
-        )
-        # Ensure no None keys (use "unknown" as fallback)
-        return {
-            (row["status"] or "unknown"): row["count"] 
-            for row in rows
-        }
+        """Get count of jobs for every status (zero when absent)."""
+        row = await self.db.fetch_one(_COUNT_BY_STATUS_SQL)
+        return row or {s.value: 0 for s in JobStatus}
     
     async def update_status(
         self,
@@ -166,7 +295,7 @@ class JobStore:
         error_message: Optional[str] = None,
     ) -> None:
         """Quick status update without full save."""
-        now = datetime.utcnow().isoformat()
+        now = to_epoch_ms(datetime.utcnow())
         
         sql = "UPDATE jobs SET status = ?, updated_at = ?"
         params = [status.value if isinstance(status, JobStatus) else status, now]
@@ -188,18 +317,112 @@ class JobStore:
         
         await self.db.execute(sql, tuple(params))
     
-    def _row_to_job(self, row: dict) -> Job:
-        """Convert a database row to a Job object."""
-        # Parse datetime strings
-        def parse_datetime(val):
-            if val:
-                return datetime.fromisoformat(val)
-            return None
+    def _job_params(self, job: Job) -> tuple:
+        """Build the parameter tuple for _JOB_UPSERT_SQL."""
+        return (
+            job.id,
+            job.source_type,
+            job.source_path,
+            job.source_url,
+            job.source_name,
+            job.status,
+            job.current_step,
+            job.next_step,
+            serialize_json(job.data),
+            serialize_json(job.config),
+            serialize_json(job.tags),
+            job.priority,
+            job.error_message,
+            to_epoch_ms(job.created_at),
+            to_epoch_ms(job.started_at),
+            to_epoch_ms(job.completed_at),
+            to_epoch_ms(job.updated_at),
+        )
+    
+    def _step_result_params(self, job_id: str, result: StepResult) -> tuple:
+        """Build the parameter tuple for _STEP_RESULT_UPSERT_SQL."""
+        return (
+            result.id,
+            job_id,
+            result.step_name,
+            result.message,
+            result.status,
+            to_epoch_ms(result.started_at),
+            to_epoch_ms(result.completed_at),
+            serialize_json(result.output_data),
+            result.error_message,
+            result.error_traceback,
+            to_epoch_ms(result.awaiting_input_since),
+            serialize_json(result.user_input) if result.user_input is not None else None,
+            to_epoch_ms(result.reverted_at),
+            result.revert_error,
+            serialize_json([a.model_dump() for a in result.artifacts]),
+        )
+    
+    async def _rows_to_jobs(self, rows: list[dict]) -> list[Job]:
+        """Convert job rows to Jobs and attach their history."""
+        jobs = [self._row_to_job(row) for row in rows]
+        await self._load_history(jobs)
+        return jobs
+    
+    async def _load_history(self, jobs: list[Job]) -> None:
+        """Fill in each job's history from the step_results table."""
+        if not jobs:
+            return
+        
+        by_id = {job.id: job for job in jobs}
+        job_ids = list(by_id)
         
-        # Parse history JSON back to StepResult objects
-        history_data = deserialize_json(row.get("history"), [])
-        history = [StepResult(**step) for step in history_data]
+        for start in range(0, len(job_ids), _HISTORY_CHUNK_SIZE):
+            chunk = job_ids[start:start + _HISTORY_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            # rowid keeps insertion order, which is the order results were appended
+            rows = await self.db.fetch_all(
+                f"SELECT {_STEP_RESULT_COLUMNS} FROM step_results "
+                f"WHERE job_id IN ({placeholders}) ORDER BY rowid",
+                tuple(chunk)
+            )
+            for row in rows:
+                by_id[row["job_id"]].history.append(self._row_to_step_result(row))
         
+        for job in jobs:
+            job._persisted_history = len(job.history)
+    
+    def _row_to_step_result(self, row: dict) -> StepResult:
+        """Convert a step_results row to a StepResult."""
+        return StepResult(
+            id=row["id"],
+            job_id=row["job_id"],
+            step_name=row["step_name"],
+            message=row["message"],
+            status=row["status"],
+            started_at=from_epoch_ms(row["started_at"]),
+            completed_at=from_epoch_ms(row["completed_at"]),
+            output_data=deserialize_json(row["output_data"], {}),
+            error_message=row["error_message"],
+            error_traceback=row["error_traceback"],
+            awaiting_input_since=from_epoch_ms(row["awaiting_input_since"]),
+            user_input=deserialize_json(row["user_input"]),
+            reverted_at=from_epoch_ms(row["reverted_at"]),
+            revert_error=row["revert_error"],
+            artifacts=deserialize_json(row["artifacts"], []),
+        )
+    
+    def _row_to_summary(self, row: dict) -> JobSummary:
+        """Convert a projected database row to a JobSummary."""
+        return JobSummary(
+            id=row["id"],
+            source_name=row["source_name"],
+            source_path=row.get("source_path"),
+            status=row["status"],
+            priority=row.get("priority") or 0,
+            current_step=row.get("current_step"),
+            next_step=row.get("next_step"),
+            created_at=from_epoch_ms(row.get("created_at")),
+        )
+    
+    def _row_to_job(self, row: dict) -> Job:
+        """Convert a database row to a Job object (history is loaded separately)."""
         return Job(
             id=row["id"],
             source_type=row["source_type"],
@@ -210,14 +433,13 @@ class JobStore:
             current_step=row.get("current_step"),
             next_step=row.get("next_step"),
             data=deserialize_json(row.get("data"), {}),
-            history=history,
             config=deserialize_json(row.get("config"), {}),
             tags=deserialize_json(row.get("tags"), []),
             priority=row.get("priority", 0),
             error_message=row.get("error_message"),
-            created_at=parse_datetime(row.get("created_at")) or datetime.utcnow(),
-            started_at=parse_datetime(row.get("started_at")),
-            completed_at=parse_datetime(row.get("completed_at")),
-            updated_at=parse_datetime(row.get("updated_at")) or datetime.utcnow(),
+            created_at=from_epoch_ms(row.get("created_at")) or datetime.utcnow(),
+            started_at=from_epoch_ms(row.get("started_at")),
+            completed_at=from_epoch_ms(row.get("completed_at")),
+            updated_at=from_epoch_ms(row.get("updated_at")) or datetime.utcnow(),
         )
 
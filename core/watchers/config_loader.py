@@ -1,14 +1,22 @@
 """Load watch configurations from YAML files."""
 
 import logging
+import os
 from pathlib import Path
 from typing import List, Optional
 import yaml
 
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader
+
 from .watch_config import WatchConfig, WatchEvent
 
 logger = logging.getLogger(__name__)
 
+_DEFAULT_IGNORE = WatchConfig.__dataclass_fields__["ignore_patterns"].default_factory
+
 
 def load_watches_from_yaml(config_path: Path) -> List[WatchConfig]:
     """
@@ -53,7 +61,7 @@ def load_watches_from_yaml(config_path: Path) -> List[WatchConfig]:
     
     try:
         with open(config_path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=_SafeLoader)
     except Exception as e:
         logger.error(f"Error loading watch config: {e}")
         return []
@@ -87,11 +95,7 @@ def _parse_watch_config(data: dict) -> Optional[WatchConfig]:
     
     # Parse path - expand user home and environment variables
     path_str = str(data["path"])
-    path = Path(path_str).expanduser()
-    
-    # Handle environment variable expansion
-    import os
-    path = Path(os.path.expandvars(str(path)))
+    path = Path(os.path.expandvars(os.path.expanduser(path_str)))
     
     # Parse events
     events = {WatchEvent.CREATED, WatchEvent.MODIFIED}  # Default
@@ -107,7 +111,7 @@ def _parse_watch_config(data: dict) -> Optional[WatchConfig]:
         source_type=data.get("source_type", "file"),
         initial_processor=data.get("initial_processor"),
         debounce_seconds=data.get("debounce_seconds", 1.0),
-        ignore_patterns=data.get("ignore_patterns", WatchConfig.__dataclass_fields__["ignore_patterns"].default_factory()),
+        ignore_patterns=data["ignore_patterns"] if "ignore_patterns" in data else _DEFAULT_IGNORE(),
         enabled=data.get("enabled", True),
         tags=data.get("tags", []),
         priority=data.get("priority", 0),
@@ -1,25 +1,91 @@
 """File system watcher that creates jobs from file events."""
 
 import asyncio
+import heapq
+import itertools
 import logging
+import os
+import sys
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Callable, Awaitable, Set
-from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import (
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
 from dataclasses import dataclass, field
-import fnmatch
 
-from watchfiles import awatch, Change
+from watchfiles import awatch, Change, DefaultFilter
 
-from .watch_config import WatchConfig, WatchEvent, FileEvent
+from .watch_config import (
+    WatchConfig,
+    WatchEvent,
+    FileEvent,
+    audio_watch,
+    video_watch,
+    markdown_watch,
+    obsidian_watch,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _iter_files(root: Path, recursive: bool) -> Iterator[os.DirEntry]:
+    """Yield the files under root as scandir entries, without building Paths.
+    
+    Like Path.rglob, symlinked directories are not descended into, while
+    symlinks to files are included.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(entry.path)
+                        elif entry.is_file():
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"Cannot scan directory {directory}: {e}")
+
+
+class WatchConfigFilter(DefaultFilter):
+    """watchfiles filter that only passes changes matching a watch's patterns.
+    
+    Applied inside awatch, so batches with no matching change are never
+    yielded. Builds on DefaultFilter to keep ignoring .git, __pycache__,
+    editor swap files and the like, as awatch does by default.
+    """
+    
+    def __init__(self, config: WatchConfig):
+        super().__init__()
+        self._config = config
+    
+    def __call__(self, change: Change, path: str) -> bool:
+        return (
+            self._config.matches_file_name(os.path.basename(path), path)
+            and super().__call__(change, path)
+        )
+
+
 @dataclass
 class PendingEvent:
     """An event waiting to be processed (for debouncing)."""
     file_event: FileEvent
-    scheduled_time: datetime
+    scheduled_time: float  # time.monotonic() deadline
 
 
 class FileWatcher:
@@ -51,18 +117,37 @@ class FileWatcher:
         await watcher.start()
     """
     
-    def __init__(self):
+    def __init__(self, max_concurrent: int = 8):
+        """
+        Initialize the watcher.
+        
+        Args:
+            max_concurrent: Maximum number of file event callbacks running at once
+        """
         self._watches: Dict[str, WatchConfig] = {}
         self._pending_events: Dict[str, PendingEvent] = {}  # path -> pending event
+        # Min-heap of (scheduled_time, seq, path, pending); entries whose pending
+        # event was replaced in _pending_events are skipped when popped
+        self._pending_heap: List[Tuple[float, int, str, PendingEvent]] = []
+        self._pending_seq = itertools.count()
+        self._wakeup = asyncio.Event()
         self._running = False
         self._tasks: List[asyncio.Task] = []
         self._debounce_task: Optional[asyncio.Task] = None
+        self._emit_tasks: Set[asyncio.Task] = set()
+        self._emit_sem = asyncio.BoundedSemaphore(max_concurrent)
+        # path -> latest emit task covering it, so emits for a path run in order
+        self._emit_chains: Dict[str, asyncio.Task] = {}
         
         # Callback when a file event is ready to process
         self._on_file_event: Optional[Callable[[FileEvent], Awaitable[None]]] = None
         
+        # Optional callback receiving all events that became ready together;
+        # when set, it replaces per-event calls to on_file_event
+        self._on_file_events_batch: Optional[Callable[[List[FileEvent]], Awaitable[None]]] = None
+        
         # Track what we've seen to detect moves
-        self._seen_files: Dict[str, Set[str]] = {}  # watch_name -> set of paths
+        self._seen_files: Set[str] = set()  # interned paths, across all watches
     
     @property
     def on_file_event(self) -> Optional[Callable[[FileEvent], Awaitable[None]]]:
@@ -73,9 +158,17 @@ class FileWatcher:
         self._on_file_event = callback
     
     @property
-    def watches(self) -> Dict[str, WatchConfig]:
-        """Get all registered watches."""
-        return self._watches.copy()
+    def on_file_events_batch(self) -> Optional[Callable[[List[FileEvent]], Awaitable[None]]]:
+        return self._on_file_events_batch
+    
+    @on_file_events_batch.setter
+    def on_file_events_batch(self, callback: Callable[[List[FileEvent]], Awaitable[None]]):
+        self._on_file_events_batch = callback
+    
+    @property
+    def watches(self) -> Mapping[str, WatchConfig]:
+        """Get all registered watches, as a read-only view."""
+        return MappingProxyType(self._watches)
     
     @property
     def is_running(self) -> bool:
@@ -88,18 +181,24 @@ class FileWatcher:
             config.path.mkdir(parents=True, exist_ok=True)
         
         self._watches[config.name] = config
-        self._seen_files[config.name] = set()
         logger.info(f"Added watch: {config.name} -> {config.path} (patterns: {config.patterns})")
     
     def remove_watch(self, name: str) -> bool:
         """Remove a directory watch by name."""
-        if name in self._watches:
-            del self._watches[name]
-            if name in self._seen_files:
-                del self._seen_files[name]
-            logger.info(f"Removed watch: {name}")
-            return True
-        return False
+        config = self._watches.pop(name, None)
+        if config is None:
+            return False
+        
+        # Forget seen files under the removed directory, unless another watch covers them
+        prefix = os.path.join(str(config.path), "")
+        kept = tuple(os.path.join(str(c.path), "") for c in self._watches.values())
+        self._seen_files = {
+            p for p in self._seen_files
+            if not p.startswith(prefix) or p.startswith(kept)
+        }
+        
+        logger.info(f"Removed watch: {name}")
+        return True
     
     def get_watch(self, name: str) -> Optional[WatchConfig]:
         """Get a watch configuration by name."""
@@ -135,12 +234,18 @@ class FileWatcher:
         if self._debounce_task:
             self._debounce_task.cancel()
         
+        for task in self._emit_tasks:
+            task.cancel()
+        
         # Wait for tasks to complete
-        if self._tasks:
-            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._tasks or self._emit_tasks:
+            await asyncio.gather(*self._tasks, *self._emit_tasks, return_exceptions=True)
         
         self._tasks.clear()
+        self._emit_tasks.clear()
+        self._emit_chains.clear()
         self._pending_events.clear()
+        self._pending_heap.clear()
         
         logger.info("File watcher stopped")
     
@@ -169,24 +274,15 @@ class FileWatcher:
             if not config.path.exists():
                 continue
             
-            # Get all files in the directory
-            if config.recursive:
-                files = list(config.path.rglob("*"))
-            else:
-                files = list(config.path.iterdir())
-            
-            for file_path in files:
-                if not file_path.is_file():
-                    continue
-                
-                if config.matches_file(file_path):
+            for entry in _iter_files(config.path, config.recursive):
+                if config.matches_file_name(entry.name, entry.path):
                     event = FileEvent(
                         event_type=WatchEvent.CREATED,
-                        path=file_path,
+                        path=Path(entry.path),
                         watch_config=config,
                     )
                     events.append(event)
-                    self._seen_files[config.name].add(str(file_path))
+                    self._seen_files.add(sys.intern(entry.path))
         
         logger.info(f"Scanned existing files: found {len(events)} matching files")
         return events
@@ -199,44 +295,45 @@ class FileWatcher:
             async for changes in awatch(
                 config.path,
                 recursive=config.recursive,
+                watch_filter=WatchConfigFilter(config),
                 step=100,  # Check every 100ms
             ):
                 if not self._running:
                     break
                 
+                # Changes were already matched against patterns by the watch filter
                 for change_type, path_str in changes:
-                    path = Path(path_str)
-                    
-                    # Skip directories
-                    if path.is_dir():
+                    # Skip directories; "*.ext" patterns are trusted to name
+                    # files, so only other patterns cost a stat
+                    if config.may_match_directories and os.path.isdir(path_str):
                         continue
                     
-                    # Check if file matches patterns
-                    if not config.matches_file(path):
-                        continue
+                    # One interned key per path, so repeated events reuse its hash
+                    path_key = sys.intern(path_str)
                     
                     # Map watchfiles Change to our WatchEvent
-                    event_type = self._map_change_type(change_type, path_str, config)
+                    event_type = self._map_change_type(change_type, path_key, config)
                     
                     if event_type and event_type in config.events:
                         file_event = FileEvent(
                             event_type=event_type,
-                            path=path,
+                            path=Path(path_key),
                             watch_config=config,
                         )
                         
                         # Add to debounce queue
-                        self._queue_event(file_event)
+                        self._queue_event(file_event, path_key)
                         
         except asyncio.CancelledError:
             logger.debug(f"Watch cancelled: {config.name}")
         except Exception as e:
             logger.error(f"Error in watch {config.name}: {e}", exc_info=True)
     
-    def _map_change_type(self, change: Change, path_str: str, config: WatchConfig) -> Optional[WatchEvent]:
+    def _map_change_type(
+        self, change: Change, path_key: str, config: WatchConfig
+    ) -> Optional[WatchEvent]:
         """Map watchfiles Change to our WatchEvent."""
-        path_key = str(path_str)
-        seen = self._seen_files.get(config.name, set())
+        seen = self._seen_files
         
         if change == Change.added:
             seen.add(path_key)
@@ -254,61 +351,135 @@ class FileWatcher:
         
         return None
     
-    def _queue_event(self, event: FileEvent) -> None:
-        """Add an event to the debounce queue."""
-        path_key = str(event.path)
-        scheduled_time = datetime.now() + timedelta(seconds=event.watch_config.debounce_seconds)
+    def _queue_event(self, event: FileEvent, path_key: Optional[str] = None) -> None:
+        """Add an event to the debounce queue, keyed by its (interned) path string."""
+        if path_key is None:
+            path_key = sys.intern(str(event.path))
+        scheduled_time = time.monotonic() + event.watch_config.debounce_seconds
         
-        self._pending_events[path_key] = PendingEvent(
+        pending = PendingEvent(
             file_event=event,
             scheduled_time=scheduled_time,
         )
+        self._pending_events[path_key] = pending
         
-        logger.debug(f"Queued event: {event.event_type.value} {event.path} (debounce: {event.watch_config.debounce_seconds}s)")
+        entry = (scheduled_time, next(self._pending_seq), path_key, pending)
+        heapq.heappush(self._pending_heap, entry)
+        
+        # Wake the debounce loop if this is now the earliest deadline
+        if self._pending_heap[0] is entry:
+            self._wakeup.set()
+        
+        logger.debug(
+            f"Queued event: {event.event_type.value} {event.path} "
+            f"(debounce: {event.watch_config.debounce_seconds}s)"
+        )
     
     async def _process_debounce_queue(self) -> None:
         """Process events that have passed their debounce time."""
+        heap = self._pending_heap
         try:
             while self._running:
-                now = datetime.now()
+                self._wakeup.clear()
+                now = time.monotonic()
                 events_to_process = []
+                ready_keys = []
                 
-                # Find events ready to process
-                for path_key, pending in list(self._pending_events.items()):
-                    if now >= pending.scheduled_time:
-                        events_to_process.append(pending.file_event)
+                # Pop events whose deadline has passed
+                while heap and heap[0][0] <= now:
+                    _, _, path_key, pending = heapq.heappop(heap)
+                    if self._pending_events.get(path_key) is pending:
                         del self._pending_events[path_key]
+                        events_to_process.append(pending.file_event)
+                        ready_keys.append(path_key)
                 
-                # Process ready events
-                for event in events_to_process:
-                    await self._emit_event(event)
+                # Process ready events without blocking the queue
+                if events_to_process and self._on_file_events_batch:
+                    self._spawn_emit(self._emit_batch(events_to_process), ready_keys)
+                else:
+                    for path_key, event in zip(ready_keys, events_to_process):
+                        self._spawn_emit(self._emit_event(event), [path_key])
                 
-                # Small sleep to prevent busy loop
-                await asyncio.sleep(0.1)
+                # Sleep until the next deadline, or until an earlier one is queued
+                timeout = heap[0][0] - now if heap else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except TimeoutError:
+                    pass
                 
         except asyncio.CancelledError:
             pass
     
     async def _emit_event(self, event: FileEvent) -> None:
         """Emit a file event to the callback."""
-        logger.info(f"File event: {event.event_type.value} {event.path} (watch: {event.watch_config.name})")
+        logger.info(
+            f"File event: {event.event_type.value} {event.path} "
+            f"(watch: {event.watch_config.name})"
+        )
         
         if self._on_file_event:
             try:
-                await self._on_file_event(event)
+                async with self._emit_sem:
+                    await self._on_file_event(event)
             except Exception as e:
                 logger.error(f"Error in file event callback: {e}", exc_info=True)
     
+    async def _emit_batch(self, events: List[FileEvent]) -> None:
+        """Emit all events that became ready together in one callback call."""
+        for event in events:
+            logger.info(
+                f"File event: {event.event_type.value} {event.path} "
+                f"(watch: {event.watch_config.name})"
+            )
+        
+        try:
+            async with self._emit_sem:
+                await self._on_file_events_batch(events)
+        except Exception as e:
+            logger.error(f"Error in file events batch callback: {e}", exc_info=True)
+    
+    def _spawn_emit(self, coro: Coroutine[None, None, None], path_keys: List[str]) -> None:
+        """
+        Run an emit coroutine as a task that stop() can cancel.
+        
+        The task first waits for any earlier emit covering one of its paths,
+        so callbacks for the same file never overlap and can safely check
+        for existing work before creating more.
+        """
+        previous = {self._emit_chains[key] for key in path_keys if key in self._emit_chains}
+        task = asyncio.create_task(self._run_after(previous, coro))
+        for key in path_keys:
+            self._emit_chains[key] = task
+        self._emit_tasks.add(task)
+        
+        def on_done(task: asyncio.Task) -> None:
+            self._emit_tasks.discard(task)
+            for key in path_keys:
+                if self._emit_chains.get(key) is task:
+                    del self._emit_chains[key]
+        
+        task.add_done_callback(on_done)
+    
+    @staticmethod
+    async def _run_after(previous: Set[asyncio.Task], coro: Coroutine[None, None, None]) -> None:
+        """Await `coro` once the `previous` tasks have finished."""
+        try:
+            if previous:
+                await asyncio.wait(previous)
+        except BaseException:
+            # Cancelled while waiting: never started, so close it quietly
+            coro.close()
+            raise
+        await coro
+    
     # Convenience methods for common watch patterns
     
     def add_audio_watch(self, path: Path, name: str = "Audio Input") -> None:
         """Add a watch for audio files."""
-        from .watch_config import audio_watch
         self.add_watch(audio_watch(path, name))
     
     def add_video_watch(self, path: Path, name: str = "Video Input") -> None:
         """Add a watch for video files."""
-        from .watch_config import video_watch
         self.add_watch(video_watch(path, name))
     
     def add_markdown_watch(
@@ -318,11 +489,9 @@ class FileWatcher:
         initial_processor: Optional[str] = None
     ) -> None:
         """Add a watch for markdown files."""
-        from .watch_config import markdown_watch
         self.add_watch(markdown_watch(path, name, initial_processor))
     
     def add_obsidian_watch(self, path: Path, name: str = "Obsidian Vault") -> None:
         """Add a watch for an Obsidian vault."""
-        from .watch_config import obsidian_watch
         self.add_watch(obsidian_watch(path, name))
 
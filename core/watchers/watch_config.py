@@ -1,12 +1,65 @@
 """Configuration and events for file watching."""
 
+import fnmatch
+import re
 from dataclasses import dataclass, field
+from functools import lru_cache
 from enum import Enum
 from pathlib import Path
 from typing import Optional, List, Set, Callable, Any
 from datetime import datetime
 
 
+@lru_cache(maxsize=1024)
+def _translate(pattern: str) -> str:
+    """Translate a glob pattern to a regex, once per distinct pattern."""
+    return fnmatch.translate(pattern)
+
+
+# "*.ext" patterns, which only need a lookup of the filename's suffix
+_SUFFIX_PATTERN_RE = re.compile(r"\*\.(\w+)")
+
+
+def _split_suffix_patterns(patterns: List[str]) -> tuple[frozenset[str], List[str]]:
+    """Split patterns into "*.ext" suffixes (without the dot) and the rest."""
+    suffixes = set()
+    rest = []
+    for pattern in patterns:
+        match = _SUFFIX_PATTERN_RE.fullmatch(pattern)
+        if match:
+            suffixes.add(match.group(1))
+        else:
+            rest.append(pattern)
+    return frozenset(suffixes), rest
+
+
+def _needs_full_path(pattern: str) -> bool:
+    """Whether matching a glob against the full path can differ from the filename.
+    
+    fnmatch's "*" also matches "/", so globs like "*draft*" match files
+    under a "draft/" directory. Literal names and "*" + literal suffixes
+    (e.g. "*~") can only match within the filename.
+    """
+    if "/" in pattern:
+        return True
+    if not any(c in pattern for c in "*?["):
+        return False
+    rest = pattern[1:] if pattern.startswith("*") else pattern
+    return any(c in rest for c in "*?[")
+
+
+@lru_cache(maxsize=64)
+def _compile_union(patterns: tuple[str, ...]) -> Optional[re.Pattern]:
+    """Compile glob patterns into one regex that matches if any of them does.
+    
+    Cached, so configs with the same patterns (passed sorted) share one
+    compiled regex.
+    """
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{_translate(p)})" for p in patterns))
+
+
 class WatchEvent(Enum):
     """Types of file system events to watch for."""
     CREATED = "created"
@@ -57,26 +110,59 @@ class WatchConfig:
     priority: int = 0
     metadata: dict = field(default_factory=dict)
     
+    def __post_init__(self):
+        self._compile_patterns()
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # Keep the compiled matchers in sync when patterns are reassigned
+        if name in ("patterns", "ignore_patterns") and "_pattern_re" in self.__dict__:
+            self._compile_patterns()
+    
+    def _compile_patterns(self) -> None:
+        """Compile patterns and ignore_patterns into suffix sets and regexes."""
+        self._exact_suffixes, glob_patterns = _split_suffix_patterns(self.patterns)
+        self._pattern_re = _compile_union(tuple(sorted(glob_patterns)))
+        
+        self._ignore_suffixes, ignore_globs = _split_suffix_patterns(self.ignore_patterns)
+        # Like fnmatch on both the name and the full path: slash-free globs are
+        # tried on the filename, and those that could also match elsewhere in
+        # the path (".git/*", "*draft*") on the full path too
+        self._ignore_re = _compile_union(tuple(sorted(p for p in ignore_globs if "/" not in p)))
+        self._ignore_path_re = _compile_union(
+            tuple(sorted(p for p in ignore_globs if _needs_full_path(p)))
+        )
+    
+    @property
+    def may_match_directories(self) -> bool:
+        """Whether any pattern is more than a "*.ext" suffix (e.g. "*" or "notes-*")."""
+        return self._pattern_re is not None
+    
     def matches_file(self, file_path: Path) -> bool:
         """Check if a file matches this watch's patterns."""
-        import fnmatch
+        return self.matches_file_name(file_path.name, file_path)
+    
+    def matches_file_name(self, filename: str, file_path: str | Path) -> bool:
+        """Check if a file matches this watch's patterns, given its name.
         
-        filename = file_path.name
+        Lets callers that already have the name (e.g. from os.scandir)
+        skip building a Path. `file_path` is only stringified when an
+        ignore pattern needs the full path.
+        """
+        _, dot, suffix = filename.rpartition(".")
         
         # Check ignore patterns first
-        for pattern in self.ignore_patterns:
-            if fnmatch.fnmatch(filename, pattern):
-                return False
-            # Also check full path for patterns like ".git/*"
-            if fnmatch.fnmatch(str(file_path), pattern):
-                return False
+        if dot and suffix in self._ignore_suffixes:
+            return False
+        if self._ignore_re is not None and self._ignore_re.match(filename):
+            return False
+        if self._ignore_path_re is not None and self._ignore_path_re.match(str(file_path)):
+            return False
         
         # Check if matches any positive pattern
-        for pattern in self.patterns:
-            if fnmatch.fnmatch(filename, pattern):
-                return True
-        
-        return False
+        if dot and suffix in self._exact_suffixes:
+            return True
+        return self._pattern_re is not None and self._pattern_re.match(filename) is not None
     
     def to_dict(self) -> dict:
         """Convert to dictionary for serialization."""
@@ -1,9 +1,13 @@
 """Example processor demonstrating the plugin system."""
 
+import logging
+
 from core.plugins.base import Processor
 from core.models import Job, StepResult, StepStatus
 from core.engine.context import ExecutionContext
 
+logger = logging.getLogger(__name__)
+
 
 class ExampleProcessor(Processor):
     """
@@ -111,9 +115,9 @@ class ExampleProcessor(Processor):
     
     async def on_load(self) -> None:
         """Called when the processor is loaded."""
-        print(f"Example processor loaded with config: {self._config}")
+        logger.debug("Example processor loaded with config: %s", self._config)
     
     async def on_unload(self) -> None:
         """Called when the processor is unloaded."""
-        print("Example processor unloaded")
+        logger.debug("Example processor unloaded")
 
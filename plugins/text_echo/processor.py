@@ -11,7 +11,9 @@ A simple processor that:
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Optional
+
+import aiofiles
 
 from core.plugins.base import Processor
 from core.models import Job, StepResult, StepStatus
@@ -32,12 +34,39 @@ class TextEchoProcessor(Processor):
     has_ui = False
     requires_input = "never"
     
+    # Extensions treated as text files
+    VALID_EXTS: frozenset[str] = frozenset({".txt", ".md", ".text", ".log"})
+    
+    # Read size when copying the source into the output file
+    CHUNK_SIZE = 1 << 20
+    
+    # Metadata header written before the file content
+    SEP = "=" * 60
+    HEADER_FMT = (
+        "{sep}\n"
+        "PROCESSED BY: NoteFlow v2 - TextEcho\n"
+        "ORIGINAL FILE: {name}\n"
+        "ORIGINAL PATH: {path}\n"
+        "{timestamp}"
+        "JOB ID: {job_id}\n"
+        "SOURCE TYPE: {source_type}\n"
+        "{sep}\n"
+    )
+    HEADER_LINES = 8  # Counting the empty line the content starts on
+    
     def __init__(self, config: dict = None):
         super().__init__(config)
         self.output_dir = Path(self.config.get("output_dir", "data/processed"))
         self.add_timestamp = self.config.get("add_timestamp", True)
         self.prefix = self.config.get("prefix", "processed_")
         
+        # Bake the separator and timestamp line into the header once, so
+        # process() only fills in the per-job fields
+        self._header_tmpl = self.HEADER_FMT.replace("{sep}", self.SEP).replace(
+            "{timestamp}", "PROCESSED AT: {timestamp}\n" if self.add_timestamp else ""
+        )
+        self._header_lines = self.HEADER_LINES + (1 if self.add_timestamp else 0)
+        
         # Ensure output directory exists
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
@@ -51,14 +80,8 @@ class TextEchoProcessor(Processor):
         
         source = Path(job.source_path)
         
-        # Check if file exists
-        if not source.exists():
-            logger.warning(f"Source file does not exist: {source}")
-            return False
-        
-        # Check if it's a text-like file
-        valid_extensions = {".txt", ".md", ".text", ".log"}
-        if source.suffix.lower() not in valid_extensions:
+        # Check if it's a text-like file; a missing file fails in process()
+        if source.suffix.lower() not in self.VALID_EXTS:
             logger.debug(f"File {source} is not a text file, skipping")
             return False
         
@@ -71,44 +94,32 @@ class TextEchoProcessor(Processor):
         logger.info(f"Processing text file: {source_path}")
         
         try:
-            # Read the source file
-            content = source_path.read_text(encoding="utf-8")
-            
             # Build metadata header
-            header_lines = [
-                "=" * 60,
-                f"PROCESSED BY: NoteFlow v2 - TextEcho",
-                f"ORIGINAL FILE: {source_path.name}",
-                f"ORIGINAL PATH: {source_path}",
-            ]
-            
-            if self.add_timestamp:
-                header_lines.append(f"PROCESSED AT: {datetime.now().isoformat()}")
-            
-            header_lines.extend([
-                f"JOB ID: {job.id}",
-                f"SOURCE TYPE: {job.source_type}",
-                "=" * 60,
-                "",
-            ])
-            
-            header = "\n".join(header_lines)
-            
-            # Combine header and content
-            processed_content = header + content
+            header = self._header_tmpl.format(
+                name=source_path.name,
+                path=source_path,
+                timestamp=datetime.now().isoformat() if self.add_timestamp else None,
+                job_id=job.id,
+                source_type=job.source_type,
+            ).encode("utf-8")
+            lines_added = self._header_lines
             
             # Generate output filename
             output_filename = f"{self.prefix}{source_path.name}"
             output_path = self.output_dir / output_filename
             
-            # Write the processed file using context (for artifact tracking)
-            await ctx.create_file(output_path, processed_content)
+            # Stream header + source into the output using context (for artifact tracking)
+            artifact = await ctx.create_file_stream(
+                output_path, self._iter_output(header, source_path)
+            )
+            processed_size = artifact.metadata["size"]
+            original_size = processed_size - len(header)
             
             # Store result information in job data
             job.data["echo_output_path"] = str(output_path)
-            job.data["echo_original_size"] = len(content)
-            job.data["echo_processed_size"] = len(processed_content)
-            job.data["echo_lines_added"] = len(header_lines)
+            job.data["echo_original_size"] = original_size
+            job.data["echo_processed_size"] = processed_size
+            job.data["echo_lines_added"] = lines_added
             
             logger.info(f"Created processed file: {output_path}")
             
@@ -118,8 +129,8 @@ class TextEchoProcessor(Processor):
                 message=f"Created {output_path}",
                 output_data={
                     "output_path": str(output_path),
-                    "original_size": len(content),
-                    "processed_size": len(processed_content),
+                    "original_size": original_size,
+                    "processed_size": processed_size,
                 },
             )
             
@@ -131,6 +142,13 @@ class TextEchoProcessor(Processor):
                 message=str(e),
             )
     
+    async def _iter_output(self, header: bytes, source_path: Path) -> AsyncIterator[bytes]:
+        """Yield the header, then the source file in CHUNK_SIZE pieces."""
+        yield header
+        async with aiofiles.open(source_path, "rb") as src:
+            while chunk := await src.read(self.CHUNK_SIZE):
+                yield chunk
+    
     async def revert(self, job: Job, result: StepResult, ctx: ExecutionContext) -> bool:
         """Clean up after revert (artifacts are auto-reverted by context)."""
         # The file deletion is handled automatically by artifact revert
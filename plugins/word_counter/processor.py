@@ -8,6 +8,7 @@ A processor that:
 4. Creates a stats file as output
 """
 
+import asyncio
 import logging
 import re
 import json
@@ -16,12 +17,41 @@ from datetime import datetime
 from collections import Counter
 from typing import Optional
 
+try:
+    import orjson
+except ImportError:  # Optional speedup, stdlib json is the fallback
+    orjson = None
+
 from core.plugins.base import Processor
 from core.models import Job, StepResult, StepStatus
 from core.engine.context import ExecutionContext
 
 logger = logging.getLogger(__name__)
 
+_WORD_RE = re.compile(r"\b\w+\b")
+
+# Maps every ASCII character that \w does not match to a space, so that on
+# ASCII text str.translate + str.split tokenizes like _WORD_RE.findall
+_ASCII_NONWORD_TO_SPACE = str.maketrans({
+    c: " " for c in map(chr, range(128)) if not (c.isalnum() or c == "_")
+})
+# The same mapping as a bytes.translate table, for lines read as ASCII bytes
+_ASCII_NONWORD_TO_SPACE_BYTES = bytes(
+    b if b < 128 and (chr(b).isalnum() or chr(b) == "_") else ord(" ")
+    for b in range(256)
+)
+
+
+if orjson is not None:
+    def _dumps_stats(stats: dict) -> str:
+        """Serialize stats as indented JSON for the stats file."""
+        return orjson.dumps(stats, option=orjson.OPT_INDENT_2).decode()
+
+else:
+    def _dumps_stats(stats: dict) -> str:
+        """Serialize stats as indented JSON for the stats file."""
+        return json.dumps(stats, indent=2)
+
 
 class WordCounterProcessor(Processor):
     """Counts words and generates statistics."""
@@ -35,11 +65,21 @@ class WordCounterProcessor(Processor):
     has_ui = False
     requires_input = "never"
     
+    # Read buffer size when streaming the file
+    READ_BUFFER = 1 << 20
+    
+    # Set once any instance has created the stats directory
+    _stats_dir_ready = False
+    
     def __init__(self, config: dict = None):
         super().__init__(config)
         self.count_unique = self.config.get("count_unique_words", True)
         self.stats_dir = Path("data/stats")
-        self.stats_dir.mkdir(parents=True, exist_ok=True)
+        # ctx.create_file also creates missing parents, so this only needs
+        # to happen once per process
+        if not WordCounterProcessor._stats_dir_ready:
+            self.stats_dir.mkdir(parents=True, exist_ok=True)
+            WordCounterProcessor._stats_dir_ready = True
         
         logger.info(f"WordCounter initialized: count_unique={self.count_unique}")
     
@@ -63,35 +103,20 @@ class WordCounterProcessor(Processor):
         logger.info(f"Counting words in: {echo_output}")
         
         try:
-            # Read the file
-            content = echo_output.read_text(encoding="utf-8")
-            
-            # Calculate statistics
-            lines = content.split("\n")
-            words = re.findall(r'\b\w+\b', content.lower())
-            
+            # Count on a worker thread so a large file doesn't block the event loop
+            counts = await asyncio.to_thread(self._compute_stats, echo_output)
             stats = {
                 "file": str(echo_output),
                 "analyzed_at": datetime.now().isoformat(),
                 "job_id": job.id,
-                "line_count": len(lines),
-                "word_count": len(words),
-                "char_count": len(content),
-                "char_count_no_spaces": len(content.replace(" ", "").replace("\n", "")),
-                "avg_word_length": round(sum(len(w) for w in words) / len(words), 2) if words else 0,
-                "avg_words_per_line": round(len(words) / len(lines), 2) if lines else 0,
+                **counts,
             }
             
-            if self.count_unique:
-                word_freq = Counter(words)
-                stats["unique_word_count"] = len(word_freq)
-                stats["top_10_words"] = dict(word_freq.most_common(10))
-            
             # Create stats output file
             stats_filename = f"stats_{echo_output.stem}_{job.id[:8]}.json"
             stats_path = self.stats_dir / stats_filename
             
-            await ctx.create_file(stats_path, json.dumps(stats, indent=2))
+            await ctx.create_file(stats_path, _dumps_stats(stats))
             
             # Store stats in job data
             job.data["word_count_stats"] = stats
@@ -115,6 +140,69 @@ class WordCounterProcessor(Processor):
                 message=str(e),
             )
     
+    def _compute_stats(self, path: Path) -> dict:
+        """Compute the file statistics in one pass over the file, a line at a time."""
+        line_count = 1  # Like str.split("\n"): newlines + 1
+        char_count = 0
+        char_count_no_spaces = 0
+        word_count = 0
+        total_word_len = 0
+        # Word frequencies are only needed for the unique-word stats
+        word_freq = Counter() if self.count_unique else None
+        
+        if word_freq is not None:
+            with open(path, "r", encoding="utf-8", buffering=self.READ_BUFFER) as f:
+                for line in f:
+                    line_count += line.endswith("\n")
+                    char_count += len(line)
+                    char_count_no_spaces += len(line) - line.count(" ") - line.count("\n")
+                    if line.isascii():
+                        words = line.lower().translate(_ASCII_NONWORD_TO_SPACE).split()
+                    else:
+                        words = _WORD_RE.findall(line.lower())
+                    word_freq.update(words)
+            
+            # Derived from the distinct words, not every occurrence
+            word_count = word_freq.total()
+            total_word_len = sum(len(word) * count for word, count in word_freq.items())
+        else:
+            # Only counts are needed, so read bytes and decode just the
+            # lines that are not ASCII
+            with open(path, "rb", buffering=self.READ_BUFFER) as f:
+                for line in f:
+                    if b"\r" in line:
+                        # Same universal newlines translation as text mode
+                        line = line.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+                    newlines = line.count(b"\n")
+                    spaces = line.count(b" ")
+                    if line.isascii():
+                        length = len(line)
+                        words = line.translate(_ASCII_NONWORD_TO_SPACE_BYTES).split()
+                    else:
+                        text = line.decode("utf-8")
+                        length = len(text)
+                        words = _WORD_RE.findall(text.lower())
+                    line_count += newlines
+                    char_count += length
+                    char_count_no_spaces += length - spaces - newlines
+                    word_count += len(words)
+                    total_word_len += sum(map(len, words))
+        
+        stats = {
+            "line_count": line_count,
+            "word_count": word_count,
+            "char_count": char_count,
+            "char_count_no_spaces": char_count_no_spaces,
+            "avg_word_length": round(total_word_len / word_count, 2) if word_count else 0,
+            "avg_words_per_line": round(word_count / line_count, 2),
+        }
+        
+        if word_freq is not None:
+            stats["unique_word_count"] = len(word_freq)
+            stats["top_10_words"] = dict(word_freq.most_common(10))
+        
+        return stats
+    
     async def revert(self, job: Job, result: StepResult, ctx: ExecutionContext) -> bool:
         """Clean up after revert."""
         job.data.pop("word_count_stats", None)
@@ -0,0 +1,161 @@
+"""Tests for watch pattern matching and the file watcher's debounce queue."""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from core.watchers import FileWatcher, WatchConfig
+from core.watchers.watch_config import FileEvent, WatchEvent
+
+
+# -------------------------------------------------------------------------
+# Test Fixtures
+# -------------------------------------------------------------------------
+
+@pytest.fixture
+async def watcher():
+    """A started watcher with no directory watches, so only the debounce loop runs."""
+    watcher = FileWatcher()
+    await watcher.start()
+    yield watcher
+    await watcher.stop()
+
+
+@pytest.fixture
+def watch_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def make_event(
+    directory: Path, name: str, debounce: float, event_type=WatchEvent.CREATED
+) -> FileEvent:
+    """Create a file event for a watch with the given debounce delay."""
+    config = WatchConfig(path=directory, name=f"watch-{debounce}", debounce_seconds=debounce)
+    return FileEvent(event_type=event_type, path=directory / name, watch_config=config)
+
+
+# -------------------------------------------------------------------------
+# Tests
+# -------------------------------------------------------------------------
+
+class TestDebounce:
+    """Tests for debounced event emission."""
+    
+    @pytest.mark.asyncio
+    async def test_requeue_restarts_debounce(self, watcher, watch_dir):
+        """Test that a new event for the same path replaces the pending one."""
+        emitted = []
+        
+        async def on_event(event):
+            emitted.append(event)
+        
+        watcher.on_file_event = on_event
+        
+        watcher._queue_event(make_event(watch_dir, "a.md", 0.2))
+        await asyncio.sleep(0.1)
+        watcher._queue_event(make_event(watch_dir, "a.md", 0.2, WatchEvent.MODIFIED))
+        
+        # The first deadline has passed, but it was superseded
+        await asyncio.sleep(0.15)
+        assert emitted == []
+        
+        await asyncio.sleep(0.2)
+        assert [e.event_type for e in emitted] == [WatchEvent.MODIFIED]
+        assert watcher._pending_events == {}
+    
+    @pytest.mark.asyncio
+    async def test_short_debounce_fires_before_long(self, watcher, watch_dir):
+        """Test that a later event with a shorter debounce is emitted first."""
+        emitted = []
+        
+        async def on_event(event):
+            emitted.append(event.filename)
+        
+        watcher.on_file_event = on_event
+        
+        watcher._queue_event(make_event(watch_dir, "slow.md", 0.3))
+        watcher._queue_event(make_event(watch_dir, "fast.md", 0.05))
+        
+        await asyncio.sleep(0.15)
+        assert emitted == ["fast.md"]
+        
+        await asyncio.sleep(0.25)
+        assert emitted == ["fast.md", "slow.md"]
+    
+    @pytest.mark.asyncio
+    async def test_batch_callback_receives_ready_events_together(self, watcher, watch_dir):
+        """Test that events ready at the same time go to the batch callback in one call."""
+        batches = []
+        single = []
+        
+        async def on_batch(events):
+            batches.append(sorted(e.filename for e in events))
+        
+        async def on_event(event):
+            single.append(event)
+        
+        watcher.on_file_event = on_event
+        watcher.on_file_events_batch = on_batch
+        
+        watcher._queue_event(make_event(watch_dir, "a.md", 0.05))
+        watcher._queue_event(make_event(watch_dir, "b.md", 0.05))
+        # Block the loop past both deadlines, so they are ready on the same tick
+        time.sleep(0.1)
+        
+        await asyncio.sleep(0.1)
+        assert batches == [["a.md", "b.md"]]
+        assert single == []
+    
+    @pytest.mark.asyncio
+    async def test_emits_for_same_path_do_not_overlap(self, watcher, watch_dir):
+        """Test that a path's next event waits for its previous callback to finish."""
+        calls = []
+        running = set()
+        
+        async def on_event(event):
+            assert event.filename not in running
+            running.add(event.filename)
+            calls.append((event.filename, event.event_type))
+            await asyncio.sleep(0.1)
+            running.discard(event.filename)
+        
+        watcher.on_file_event = on_event
+        
+        watcher._queue_event(make_event(watch_dir, "a.md", 0.01))
+        await asyncio.sleep(0.05)
+        # The first callback is still running when these become ready
+        watcher._queue_event(make_event(watch_dir, "a.md", 0.01, WatchEvent.MODIFIED))
+        watcher._queue_event(make_event(watch_dir, "b.md", 0.01))
+        
+        await asyncio.sleep(0.05)
+        assert calls == [("a.md", WatchEvent.CREATED), ("b.md", WatchEvent.CREATED)]
+        
+        await asyncio.sleep(0.1)
+        assert calls[-1] == ("a.md", WatchEvent.MODIFIED)
+        
+        await asyncio.sleep(0.1)
+        assert watcher._emit_chains == {}
+
+
+class TestWatchConfig:
+    """Tests for watch pattern matching."""
+    
+    def test_ignore_glob_matches_directory_in_path(self):
+        """Test that a wildcard ignore glob also ignores files under a matching directory."""
+        config = WatchConfig(
+            path=Path("/vault"),
+            name="vault",
+            patterns=["*.md"],
+            ignore_patterns=["*draft*", "*~"],
+        )
+        
+        assert config.matches_file(Path("/vault/notes/idea.md"))
+        assert not config.matches_file(Path("/vault/my-draft.md"))
+        assert not config.matches_file(Path("/vault/draft/idea.md"))
+        assert not config.matches_file(Path("/vault/notes/idea.md~"))
+        # "*~" can only match the filename
+        assert config.matches_file(Path("/vault/old~/idea.md"))
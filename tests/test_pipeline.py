@@ -3,9 +3,11 @@
 import pytest
 import asyncio
 import tempfile
+from contextlib import aclosing
 from pathlib import Path
+from typing import Optional
 
-from core.models import Job, JobStatus, StepResult, StepStatus
+from core.models import Job, JobStatus, StepResult, StepStatus, Artifact, ArtifactType
 from core.storage import Database, JobStore, ArtifactStore
 from core.plugins import Processor, ProcessorRegistry
 from core.engine import ExecutionContext, Router, JobExecutor, Pipeline
@@ -38,42 +40,31 @@ async def stores(temp_db):
 # Test Processors
 # -------------------------------------------------------------------------
 
-class TestProcessor1(Processor):
-    """A simple test processor."""
+class _StubProcessor(Processor):
+    """A processor that always applies and completes with a fixed output."""
     
-    name = "test_step1"
-    display_name = "Test Step 1"
-    requires = []
+    _output: Optional[dict] = None
     
     async def should_process(self, job: Job) -> bool:
         return True
     
     async def process(self, job: Job, ctx: ExecutionContext) -> StepResult:
         result = StepResult(job_id=job.id, step_name=self.name)
-        result.complete({"step1_done": True})
+        result.complete(self._output)
         return result
     
     async def revert(self, job: Job, step_result: StepResult, ctx: ExecutionContext) -> bool:
         return True
 
 
-class TestProcessor2(Processor):
-    """A processor that depends on TestProcessor1."""
-    
-    name = "test_step2"
-    display_name = "Test Step 2"
-    requires = ["test_step1"]
-    
-    async def should_process(self, job: Job) -> bool:
-        return True
-    
-    async def process(self, job: Job, ctx: ExecutionContext) -> StepResult:
-        result = StepResult(job_id=job.id, step_name=self.name)
-        result.complete({"step2_done": True})
-        return result
-    
-    async def revert(self, job: Job, step_result: StepResult, ctx: ExecutionContext) -> bool:
-        return True
+def make_processor(name: str, requires=(), output: Optional[dict] = None) -> Processor:
+    """Create a stub processor without defining a Processor subclass per case."""
+    processor = _StubProcessor()
+    processor.name = name
+    processor.display_name = name.replace("_", " ").title()
+    processor.requires = list(requires)
+    processor._output = output
+    return processor
 
 
 class HumanInLoopProcessor(Processor):
@@ -100,6 +91,15 @@ class HumanInLoopProcessor(Processor):
         return True
 
 
+@pytest.fixture(scope="module")
+def base_processors():
+    """Stateless test processors, shared by the registries of this module."""
+    return (
+        make_processor("test_step1", output={"step1_done": True}),
+        make_processor("test_step2", requires=["test_step1"], output={"step2_done": True}),
+    )
+
+
 # -------------------------------------------------------------------------
 # Tests
 # -------------------------------------------------------------------------
@@ -107,46 +107,45 @@ class HumanInLoopProcessor(Processor):
 class TestProcessorRegistry:
     """Tests for the processor registry."""
     
-    def test_register_processor(self):
+    def test_register_processor(self, base_processors):
         """Test registering a processor."""
         registry = ProcessorRegistry()
-        processor = TestProcessor1()
+        processor, _ = base_processors
         
         registry.register(processor)
         
         assert registry.has("test_step1")
         assert registry.get("test_step1") is processor
     
-    def test_dependency_order(self):
+    def test_dependency_order(self, base_processors):
         """Test getting execution order based on dependencies."""
         registry = ProcessorRegistry()
-        registry.register(TestProcessor1())
-        registry.register(TestProcessor2())
+        for processor in base_processors:
+            registry.register(processor)
         
         order = registry.get_execution_order(["test_step1", "test_step2"])
         
         assert order == ["test_step1", "test_step2"]
     
+    def test_execution_order_without_inner_dependencies(self, base_processors):
+        """Test that subsets without inner dependencies keep input order."""
+        registry = ProcessorRegistry()
+        for processor in base_processors:
+            registry.register(processor)
+        
+        assert registry.get_execution_order([]) == []
+        assert registry.get_execution_order(["test_step2"]) == ["test_step2"]
+        
+        # Dependencies inside the subset are still honoured
+        order = registry.get_execution_order(["test_step2", "test_step1"])
+        assert order == ["test_step1", "test_step2"]
+    
     def test_circular_dependency_detection(self):
         """Test that circular dependencies are detected."""
         # Create processors with circular dependency
-        class CircularA(Processor):
-            name = "circular_a"
-            requires = ["circular_b"]
-            async def should_process(self, job): return True
-            async def process(self, job, ctx): pass
-            async def revert(self, job, result, ctx): return True
-        
-        class CircularB(Processor):
-            name = "circular_b"
-            requires = ["circular_a"]
-            async def should_process(self, job): return True
-            async def process(self, job, ctx): pass
-            async def revert(self, job, result, ctx): return True
-        
         registry = ProcessorRegistry()
-        registry.register(CircularA())
-        registry.register(CircularB())
+        registry.register(make_processor("circular_a", requires=["circular_b"]))
+        registry.register(make_processor("circular_b", requires=["circular_a"]))
         
         with pytest.raises(ValueError, match="Circular dependency"):
             registry.get_execution_order(["circular_a", "circular_b"])
@@ -156,10 +155,10 @@ class TestRouter:
     """Tests for the pipeline router."""
     
     @pytest.fixture
-    def registry(self):
+    def registry(self, base_processors):
         reg = ProcessorRegistry()
-        reg.register(TestProcessor1())
-        reg.register(TestProcessor2())
+        for processor in base_processors:
+            reg.register(processor)
         return reg
     
     @pytest.mark.asyncio
@@ -203,6 +202,8 @@ class TestJobStore:
         assert retrieved is not None
         assert retrieved.id == job.id
         assert retrieved.source_name == "test job"
+        # Datetimes are stored with millisecond precision
+        assert abs((retrieved.created_at - job.created_at).total_seconds()) < 0.001
     
     @pytest.mark.asyncio
     async def test_list_pending(self, stores):
@@ -219,6 +220,240 @@ class TestJobStore:
         assert len(pending) == 2
         # Higher priority should come first
         assert pending[0].source_name == "job2"
+    
+    @pytest.mark.asyncio
+    async def test_list_pending_ids_and_summaries(self, stores):
+        """Test the lightweight listing queries."""
+        job_store, _ = stores
+        
+        job1 = Job(source_type="test", source_name="job1", priority=1)
+        job2 = Job(source_type="test", source_name="job2", priority=2)
+        await job_store.save(job1)
+        await job_store.save(job2)
+        
+        assert await job_store.list_pending_ids() == [job2.id, job1.id]
+        
+        summaries = await job_store.list_summaries(status=JobStatus.PENDING)
+        assert {s.id for s in summaries} == {job1.id, job2.id}
+        assert all(s.status == "pending" for s in summaries)
+    
+    @pytest.mark.asyncio
+    async def test_count_by_status(self, stores):
+        """Test that counts include every status, even when absent."""
+        job_store, _ = stores
+        
+        await job_store.save(Job(source_type="test", source_name="job1"))
+        
+        counts = await job_store.count_by_status()
+        assert counts["pending"] == 1
+        assert counts["completed"] == 0
+        assert set(counts) == {s.value for s in JobStatus}
+    
+    @pytest.mark.asyncio
+    async def test_save_many_and_batch(self, stores):
+        """Test bulk saves and rollback of a failed batch."""
+        job_store, _ = stores
+        
+        jobs = [Job(source_type="test", source_name=f"job{i}") for i in range(3)]
+        await job_store.save_many(jobs)
+        assert len(await job_store.list_all()) == 3
+        
+        with pytest.raises(RuntimeError):
+            async with job_store.batch():
+                await job_store.save(Job(source_type="test", source_name="discarded"))
+                raise RuntimeError("abort batch")
+        
+        assert len(await job_store.list_all()) == 3
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_saves_with_history(self, stores):
+        """Test that concurrent saves each commit their own job and history."""
+        job_store, _ = stores
+        
+        jobs = []
+        for i in range(20):
+            job = Job(source_type="test", source_name=f"job{i}")
+            result = StepResult(job_id=job.id, step_name="test_step1")
+            result.complete({"i": i})
+            job.add_step_result(result)
+            jobs.append(job)
+        
+        await asyncio.gather(*(job_store.save(job) for job in jobs))
+        
+        assert len(await job_store.list_all()) == 20
+        for i, job in enumerate(jobs):
+            loaded = await job_store.get(job.id)
+            assert [r.output_data for r in loaded.history] == [{"i": i}]
+    
+    @pytest.mark.asyncio
+    async def test_history_round_trip(self, stores):
+        """Test that history is stored in step_results and appended on save."""
+        job_store, _ = stores
+        
+        job = Job(source_type="test", source_name="test")
+        first = StepResult(job_id=job.id, step_name="test_step1", message="first")
+        first.complete({"a": 1})
+        job.add_step_result(first)
+        await job_store.save(job)
+        
+        loaded = await job_store.get(job.id)
+        assert [r.id for r in loaded.history] == [first.id]
+        assert loaded.history[0].output_data == {"a": 1}
+        assert loaded.history[0].message == "first"
+        
+        second = StepResult(job_id=job.id, step_name="test_step2")
+        second.await_input()
+        loaded.add_step_result(second)
+        await job_store.save(loaded)
+        
+        # Earlier entries are only rewritten through save_step_result
+        loaded.history[0].mark_reverted()
+        await job_store.save_step_result(job.id, loaded.history[0])
+        
+        reloaded = await job_store.get(job.id)
+        assert [r.id for r in reloaded.history] == [first.id, second.id]
+        assert reloaded.history[0].status == StepStatus.REVERTED
+        assert reloaded.history[1].status == StepStatus.AWAITING_INPUT
+
+
+class TestArtifactStore:
+    """Tests for the artifact store."""
+    
+    @pytest.mark.asyncio
+    async def test_save_many(self, stores):
+        """Test saving a batch of artifacts in one transaction."""
+        job_store, artifact_store = stores
+        
+        job = Job(source_type="test", source_name="test")
+        await job_store.save(job)
+        
+        artifacts = [
+            Artifact(
+                job_id=job.id,
+                step_name="test_step",
+                artifact_type=ArtifactType.FILE_CREATE,
+                target=f"/tmp/file{i}.txt",
+            )
+            for i in range(3)
+        ]
+        await artifact_store.save_many(artifacts)
+        
+        saved = await artifact_store.list_by_job(job.id)
+        assert {a.id for a in saved} == {a.id for a in artifacts}
+        assert await artifact_store.total_by_job(job.id) == 3
+        # Artifacts are saved as pending, so nothing is reversible yet
+        assert not await artifact_store.has_reversible(job.id)
+        
+        artifacts[0].mark_created()
+        await artifact_store.save(artifacts[0])
+        assert await artifact_store.has_reversible(job.id)
+    
+    @pytest.mark.asyncio
+    async def test_iter_by_job_releases_connection_on_early_exit(self, temp_db, stores):
+        """Test that closing the stream early returns its read connection to the pool."""
+        job_store, artifact_store = stores
+        
+        job = Job(source_type="test", source_name="test")
+        await job_store.save(job)
+        await artifact_store.save_many([
+            Artifact(
+                job_id=job.id,
+                step_name="test_step",
+                artifact_type=ArtifactType.FILE_CREATE,
+                target=f"/tmp/file{i}.txt",
+            )
+            for i in range(3)
+        ])
+        
+        async with aclosing(artifact_store.iter_by_job(job.id)) as artifacts:
+            async for _ in artifacts:
+                assert temp_db._read_pool.qsize() == temp_db.read_pool_size - 1
+                break
+        
+        assert temp_db._read_pool.qsize() == temp_db.read_pool_size
+    
+    @pytest.mark.asyncio
+    async def test_save_many_joins_open_transaction(self, stores):
+        """Test that bulk saves inside a batch see and commit with its writes."""
+        job_store, artifact_store = stores
+        
+        job = Job(source_type="test", source_name="test")
+        artifact = Artifact(
+            job_id=job.id,
+            step_name="test_step",
+            artifact_type=ArtifactType.FILE_CREATE,
+            target="/tmp/file.txt",
+        )
+        
+        async with job_store.batch():
+            await job_store.save(job)
+            await artifact_store.save_many([artifact])
+        
+        assert await artifact_store.total_by_job(job.id) == 1
+        
+        # List paths build artifacts from tuple rows; they match a validated get()
+        by_step = await artifact_store.list_by_step(job.id, "test_step")
+        fetched = await artifact_store.get(by_step[0].id)
+        assert by_step[0].model_dump() == fetched.model_dump()
+    
+    @pytest.mark.asyncio
+    async def test_save_many_does_not_join_other_task_transaction(self, stores):
+        """Test that a bulk save from another task survives a rolled back batch."""
+        job_store, artifact_store = stores
+        
+        job = Job(source_type="test", source_name="test")
+        await job_store.save(job)
+        artifact = Artifact(
+            job_id=job.id,
+            step_name="test_step",
+            artifact_type=ArtifactType.FILE_CREATE,
+            target="/tmp/file.txt",
+        )
+        
+        in_batch = asyncio.Event()
+        release = asyncio.Event()
+        
+        async def failing_batch():
+            async with job_store.batch():
+                await job_store.update_status(job.id, JobStatus.CANCELLED)
+                in_batch.set()
+                await release.wait()
+                raise RuntimeError("boom")
+        
+        batch_task = asyncio.create_task(failing_batch())
+        await in_batch.wait()
+        save_task = asyncio.create_task(artifact_store.save_many([artifact]))
+        await asyncio.sleep(0.01)
+        release.set()
+        
+        with pytest.raises(RuntimeError):
+            await batch_task
+        await save_task
+        
+        assert (await job_store.get(job.id)).status == JobStatus.PENDING
+        assert await artifact_store.total_by_job(job.id) == 1
+    
+    @pytest.mark.asyncio
+    async def test_mark_irreversible_keeps_metadata(self, stores):
+        """Test that marking irreversible merges into existing metadata."""
+        job_store, artifact_store = stores
+        
+        job = Job(source_type="test", source_name="test")
+        await job_store.save(job)
+        
+        artifact = Artifact(
+            job_id=job.id,
+            step_name="test_step",
+            artifact_type=ArtifactType.EXTERNAL_API_CREATE,
+            target="notion:create_page",
+            metadata={"service": "notion"},
+        )
+        await artifact_store.save(artifact)
+        await artifact_store.mark_irreversible(artifact.id, "cannot undo")
+        
+        saved = await artifact_store.get(artifact.id)
+        assert saved.status == "irreversible"
+        assert saved.metadata == {"service": "notion", "irreversible_reason": "cannot undo"}
 
 
 class TestExecutionContext:
@@ -260,3 +495,77 @@ class TestExecutionContext:
             # File should be deleted on rollback
             assert not file_path.exists()
 
+    
+    @pytest.mark.asyncio
+    async def test_create_file_stream(self, stores):
+        """Test streaming chunks into a new file through the context."""
+        job_store, artifact_store = stores
+        job = Job(source_type="test", source_name="test")
+        await job_store.save(job)
+        
+        async def chunks():
+            yield b"Hello, "
+            yield b"World!"
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            file_path = Path(tmpdir) / "out" / "test.txt"
+            
+            ctx = ExecutionContext(job, "test_step", artifact_store)
+            artifact = await ctx.create_file_stream(file_path, chunks())
+            committed = await ctx.commit()
+            
+            assert file_path.read_bytes() == b"Hello, World!"
+            assert artifact.metadata["size"] == 13
+            assert [a.id for a in committed] == [artifact.id]
+            assert await artifact_store.total_by_job(job.id) == 1
+    
+    @pytest.mark.asyncio
+    async def test_create_file_stream_failure_removes_file(self, stores):
+        """Test that a failing chunk stream leaves no file and no artifact."""
+        job_store, artifact_store = stores
+        job = Job(source_type="test", source_name="test")
+        await job_store.save(job)
+        
+        async def chunks():
+            yield b"partial"
+            raise OSError("source went away")
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            file_path = Path(tmpdir) / "test.txt"
+            
+            ctx = ExecutionContext(job, "test_step", artifact_store)
+            with pytest.raises(OSError, match="source went away"):
+                await ctx.create_file_stream(file_path, chunks())
+            
+            assert not file_path.exists()
+            assert await ctx.commit() == []
+            assert await artifact_store.total_by_job(job.id) == 0
+
+
+class TestPipeline:
+    """Tests for the pipeline's background worker."""
+    
+    @pytest.mark.asyncio
+    async def test_poll_skips_active_jobs(self, stores):
+        """Test that the pending-job poll only starts jobs that are not already running."""
+        job_store, _ = stores
+        
+        jobs = [Job(source_type="test", source_name=f"job{i}", priority=3 - i) for i in range(3)]
+        for job in jobs:
+            await job_store.save(job)
+        
+        pipeline = Pipeline(db_path=":memory:", max_concurrent_jobs=2)
+        pipeline.job_store = job_store
+        # The highest-priority job is running but still pending in the store
+        pipeline._active_jobs.add(jobs[0].id)
+        
+        started = []
+        
+        async def record(job):
+            started.append(job.source_name)
+        
+        pipeline._process_job_async = record
+        await pipeline._process_pending_jobs()
+        await asyncio.sleep(0)
+        
+        assert started == ["job1"]